@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP API for face verification and NID extraction.
+
+Usage:
+    python api_server.py --host 0.0.0.0 --port 8000 --workers 4 --max-queue 16
+
+Endpoints (images are base64-encoded in JSON bodies):
+    POST /v1/face/verify   {"img1": "...", "img2": "...", "include_crops": false}
+    POST /v1/nid/extract   {"image": "...", "use_cache": true}
+    POST /v1/kyc/verify    {"nid_image": "...", "selfie": "...", "use_cache": true}
+    GET  /healthz          liveness: the server process is up
+    GET  /readyz           readiness: every worker has loaded and warmed its models
+    GET  /metrics          Prometheus metrics of the API process
+
+Requests are handled by a pool of worker processes that each load the face
+models once at start. At most --max-queue requests are admitted at a time;
+beyond that the server answers 429 with Retry-After instead of queueing
+without bound. Until the workers are warm, or while a crashed pool is being
+replaced, work requests get 503.
+"""
+
+import argparse
+import base64
+import binascii
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import metrics
+from key_pool import KeyPoolTimeout
+
+DEFAULT_HOST = os.getenv("API_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.getenv("API_PORT", "8000"))
+DEFAULT_WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
+# Admitted requests (queued plus running); 0 means four per worker
+DEFAULT_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "0"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("API_REQUEST_TIMEOUT", "120"))
+MAX_BODY_BYTES = int(os.getenv("API_MAX_BODY_BYTES", str(25 * 1024 * 1024)))
+
+# Seconds clients are asked to wait after a 429 or 503
+RETRY_AFTER_SECONDS = 2
+# How long each warm-up task occupies a worker
+WARMUP_HOLD_SECONDS = 0.05
+
+metrics.REGISTRY.describe("api_requests_total", "HTTP requests by route and status code.")
+metrics.REGISTRY.describe("api_request_seconds", "HTTP request latency by route.")
+metrics.REGISTRY.describe("api_rejected_total", "Requests turned away by reason (queue_full, not_ready).")
+
+
+# ---------------------------------------------------------------------------
+# Worker process side. The face and NID modules are only imported here, so the
+# API process itself never loads TensorFlow.
+
+def _init_worker(workers: int) -> None:
+    # Runs once in each worker process: load and warm the face models up front
+    import model_registry
+    from face_recog import MODEL_NAME, DETECTOR_BACKEND
+    model_registry.preload(MODEL_NAME, DETECTOR_BACKEND)
+
+    # Worker processes exit without running atexit handlers; a multiprocessing
+    # finalizer writes the results still queued for the result store instead
+    import result_store
+    from multiprocessing.util import Finalize
+    Finalize(None, result_store.close_store, exitpriority=10)
+
+    # Every worker has its own key pool, so each gets an equal share of the
+    # per-key request budget (a share below one request a minute still holds
+    # one token and refills more slowly)
+    import nid_recog
+    from key_pool import KeyPool
+    try:
+        api_keys = nid_recog._load_api_keys()
+    except ValueError:
+        return  # NID requests report the missing key configuration
+    nid_recog.set_key_pool(KeyPool(api_keys, nid_recog.REQUESTS_PER_MINUTE_PER_KEY / workers,
+                                   nid_recog.KEY_COOLDOWN_SECONDS))
+
+
+def _warmup() -> int:
+    # The initializer has already run by the time a task executes. Holding the
+    # task briefly keeps one warm worker from taking every warm-up task while
+    # the others are still loading their models.
+    time.sleep(WARMUP_HOLD_SECONDS)
+    return os.getpid()
+
+
+def _encode_crop(face_rgb) -> str:
+    import image_io
+    return base64.b64encode(image_io.encode_image(face_rgb[:, :, ::-1], '.jpg')).decode('ascii')
+
+
+def _json_safe(results: Dict[str, Any], crops: Dict[str, str], include_crops: bool) -> Dict[str, Any]:
+    # Replace cropped face arrays with base64 JPEGs, or drop them
+    import numpy as np
+    safe = {k: v for k, v in results.items() if not isinstance(v, np.ndarray) and k not in crops}
+    if include_crops:
+        for key, name in crops.items():
+            if results.get(key) is not None:
+                safe[name] = _encode_crop(results[key])
+    return safe
+
+
+def _verify_faces(img1: bytes, img2: bytes, include_crops: bool) -> Dict[str, Any]:
+    from face_recog import detect_face
+    import result_store
+    results = detect_face(img1, img2)
+    result_store.record('face', results, channel='api')
+    results['verified'] = bool(results['verified'])
+    return _json_safe(results, {'face1_cropped': 'face1_jpeg', 'face2_cropped': 'face2_jpeg'}, include_crops)
+
+
+def _extract_nid(image: bytes, use_cache: bool) -> Dict[str, Any]:
+    from nid_recog import get_nid_info
+    import result_store
+    timings = {}
+    nid_info = get_nid_info(image, use_cache=use_cache, timings=timings)
+    result_store.record('nid', nid_info, channel='api')
+    return {'nid_info': nid_info, 'timings': timings}
+
+
+def _verify_customer(nid_image: bytes, selfie: bytes, use_cache: bool, include_crops: bool) -> Dict[str, Any]:
+    from kyc_pipeline import verify_customer
+    import result_store
+    result = verify_customer(nid_image, selfie, use_cache=use_cache)
+    result_store.record('kyc', result, channel='api')
+    if result['face_match'] is not None:
+        result['face_match'] = _json_safe(result['face_match'],
+                                          {'portrait_cropped': 'portrait_jpeg', 'selfie_cropped': 'selfie_jpeg'},
+                                          include_crops)
+        result['face_match']['verified'] = bool(result['face_match']['verified'])
+    result['verified'] = bool(result['verified'])
+    return result
+
+
+# ---------------------------------------------------------------------------
+# API process side
+
+class ServiceUnavailable(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status to send."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class WorkerService:
+    """
+    Warm process pool with a bounded number of admitted requests.
+
+    The pool is created and warmed in the background; is_ready() turns True
+    once every worker has loaded its models. A pool broken by a crashed worker
+    is replaced automatically.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_MAX_QUEUE,
+                 request_timeout: float = REQUEST_TIMEOUT_SECONDS):
+        """
+        Args:
+            workers (int): Number of worker processes
+            max_queue (int): Maximum admitted requests (running plus waiting);
+                0 means four per worker
+            request_timeout (float): Seconds to wait for a worker result
+        """
+        self.workers = max(1, workers)
+        self.max_queue = max_queue or self.workers * 4
+        self.request_timeout = request_timeout
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._ready = False
+        self._error = None
+        self._in_flight = 0
+        self._generation = 0
+        self._started_at = time.time()
+
+    def start(self) -> None:
+        """Create and warm the worker pool in a background thread."""
+        threading.Thread(target=self._start_pool, name="pool-warmup", daemon=True).start()
+
+    def _start_pool(self) -> None:
+        # TensorFlow is not fork-safe, so workers are started fresh
+        context = multiprocessing.get_context('spawn')
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(self.workers,))
+        with self._lock:
+            self._pool = pool
+            self._ready = False
+            self._generation += 1
+        try:
+            # A worker only runs tasks once its initializer has loaded the
+            # models, so the pool is warm when every worker process has
+            # answered a warm-up task. A worker that is already warm may answer
+            # several, so rounds are submitted until every process has.
+            warm_pids = set()
+            while len(warm_pids) < self.workers:
+                futures = [pool.submit(_warmup) for _ in range(self.workers - len(warm_pids))]
+                warm_pids.update(future.result() for future in futures)
+        except Exception as e:
+            with self._lock:
+                self._error = f"{type(e).__name__}: {e}"
+            print(f"Worker pool failed to start: {self._error}", file=sys.stderr)
+            return
+        with self._lock:
+            if self._pool is pool:
+                self._ready = True
+                self._error = None
+
+    def _replace_pool(self, broken_pool) -> None:
+        with self._lock:
+            if self._pool is not broken_pool:
+                return  # another request already replaced it
+            self._ready = False
+            self._pool = None
+        broken_pool.shutdown(wait=False, cancel_futures=True)
+        print("Worker pool broke, restarting", file=sys.stderr)
+        self.start()
+
+    def is_ready(self) -> bool:
+        """Return True once every worker is warm."""
+        return self._ready
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness details for /readyz."""
+        with self._lock:
+            return {
+                'ready': self._ready,
+                'workers': self.workers,
+                'in_flight': self._in_flight,
+                'max_queue': self.max_queue,
+                'pool_generation': self._generation,
+                'uptime': time.time() - self._started_at,
+                'error': self._error
+            }
+
+    def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on a worker and wait for its result.
+
+        Raises:
+            ServiceUnavailable: 429 if the queue is full, 503 if the pool is not
+                ready or broke while running the request, 504 on timeout
+            Exception: Whatever fn raised in the worker
+        """
+        if not self._ready:
+            metrics.inc('api_rejected_total', reason='not_ready')
+            if self._error:
+                raise ServiceUnavailable(503, f"Workers failed to start: {self._error}")
+            raise ServiceUnavailable(503, "Workers are starting, retry shortly")
+        if not self._slots.acquire(blocking=False):
+            metrics.inc('api_rejected_total', reason='queue_full')
+            raise ServiceUnavailable(429, f"Too many requests in progress (limit {self.max_queue})")
+
+        with self._lock:
+            self._in_flight += 1
+            pool = self._pool
+        try:
+            if pool is None:
+                raise ServiceUnavailable(503, "Workers are restarting, retry shortly")
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._release_slot()
+            self._replace_pool(pool)
+            raise ServiceUnavailable(503, "A worker crashed, the pool is restarting")
+        except BaseException:
+            self._release_slot()
+            raise
+        # The slot is held until the task has finished: cancel() cannot stop a
+        # task that is already running, so a timed-out request keeps its worker
+        # busy until it ends
+        future.add_done_callback(lambda _: self._release_slot())
+
+        try:
+            return future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ServiceUnavailable(504, f"No result within {self.request_timeout:g}s")
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            raise ServiceUnavailable(503, "A worker crashed, the pool is restarting")
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            pool, self._pool, self._ready = self._pool, None, False
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+class BadRequest(Exception):
+    """Invalid request body."""
+
+
+class PayloadTooLarge(Exception):
+    """Request body larger than MAX_BODY_BYTES."""
+
+
+def _decode_image(body: Dict[str, Any], field: str) -> bytes:
+    value = body.get(field)
+    if not isinstance(value, str) or not value:
+        raise BadRequest(f"'{field}' must be a base64-encoded image")
+    # Tolerate data URLs such as 'data:image/jpeg;base64,...'
+    if value.startswith('data:') and ',' in value:
+        value = value.split(',', 1)[1]
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise BadRequest(f"'{field}' is not valid base64")
+
+
+def _error_status(error: Exception) -> int:
+    # ValueError covers undecodable images and faces that cannot be detected
+    if isinstance(error, (ValueError, FileNotFoundError)):
+        return 422
+    if isinstance(error, KeyPoolTimeout):
+        return 503
+    return 500
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    """Routes requests to the shared WorkerService."""
+
+    server_version = "EXIMVerification/1.0"
+    service: WorkerService = None  # set by make_server
+
+    def log_message(self, format, *args):
+        # Access logs go to stderr with a timestamp, like the default, but
+        # without reverse DNS lookups
+        sys.stderr.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {self.address_string()} {format % args}\n")
+
+    def address_string(self):
+        return self.client_address[0]
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, error: str, message: str) -> None:
+        headers = {'Retry-After': str(RETRY_AFTER_SECONDS)} if status in (429, 503) else None
+        self._send_json(status, {'error': error, 'message': message}, headers)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            raise BadRequest("Request body is empty")
+        if length > MAX_BODY_BYTES:
+            raise PayloadTooLarge(f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise BadRequest(f"Request body is not valid JSON: {e}")
+        if not isinstance(body, dict):
+            raise BadRequest("Request body must be a JSON object")
+        return body
+
+    def do_GET(self):
+        start_time = time.perf_counter()
+        route = self.path.split('?', 1)[0]
+        if route == '/healthz':
+            status = 200
+            self._send_json(status, {'status': 'ok'})
+        elif route == '/readyz':
+            service_status = self.service.status()
+            status = 200 if service_status['ready'] else 503
+            self._send_json(status, service_status)
+        elif route == '/metrics':
+            status = 200
+            body = metrics.export_prometheus().encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            route, status = 'unknown', 404
+            self._send_error(status, 'NotFound', f"No route for GET {self.path}")
+        self._record(route, status, start_time)
+
+    def do_POST(self):
+        start_time = time.perf_counter()
+        route = self.path.split('?', 1)[0]
+        handler = self.ROUTES.get(route)
+        if handler is None:
+            self._send_error(404, 'NotFound', f"No route for POST {self.path}")
+            self._record('unknown', 404, start_time)
+            return
+
+        try:
+            status, payload = handler(self, self._read_json())
+            self._send_json(status, payload)
+        except BadRequest as e:
+            status = 400
+            self._send_error(status, 'BadRequest', str(e))
+        except PayloadTooLarge as e:
+            status = 413
+            self._send_error(status, 'PayloadTooLarge', str(e))
+        except ServiceUnavailable as e:
+            status = e.status
+            self._send_error(status, 'ServiceUnavailable', str(e))
+        except Exception as e:
+            status = _error_status(e)
+            self._send_error(status, type(e).__name__, str(e))
+        self._record(route, status, start_time)
+
+    def _record(self, route: str, status: int, start_time: float) -> None:
+        metrics.inc('api_requests_total', route=route, status=status)
+        metrics.observe('api_request_seconds', time.perf_counter() - start_time, route=route)
+
+    def _face_verify(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        img1, img2 = _decode_image(body, 'img1'), _decode_image(body, 'img2')
+        return 200, self.service.run(_verify_faces, img1, img2, bool(body.get('include_crops', False)))
+
+    def _nid_extract(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        image = _decode_image(body, 'image')
+        return 200, self.service.run(_extract_nid, image, bool(body.get('use_cache', True)))
+
+    def _kyc_verify(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        nid_image, selfie = _decode_image(body, 'nid_image'), _decode_image(body, 'selfie')
+        return 200, self.service.run(_verify_customer, nid_image, selfie, bool(body.get('use_cache', True)),
+                                     bool(body.get('include_crops', False)))
+
+    ROUTES = {
+        '/v1/face/verify': _face_verify,
+        '/v1/nid/extract': _nid_extract,
+        '/v1/kyc/verify': _kyc_verify
+    }
+
+
+def make_server(host: str, port: int, service: WorkerService) -> ThreadingHTTPServer:
+    """Build the HTTP server; each connection is handled on its own thread."""
+    handler = type('BoundAPIHandler', (APIHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    """Parse command line arguments and serve until interrupted."""
+    parser = argparse.ArgumentParser(description="HTTP API for face verification and NID extraction.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Requests admitted at once before answering 429 (default: 4 per worker)")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT_SECONDS, help="Per-request timeout, seconds")
+    args = parser.parse_args()
+
+    service = WorkerService(args.workers, args.max_queue, args.timeout)
+    service.start()
+    server = make_server(args.host, args.port, service)
+    print(f"Serving on http://{args.host}:{args.port} with {service.workers} workers "
+          f"(queue limit {service.max_queue}); warming up models")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
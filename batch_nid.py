@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Concurrent batch NID extraction over a directory of images or a manifest.
+
+Usage:
+    python batch_nid.py images/ --pattern "nid_*" -o nid_results.jsonl --concurrency 8
+    python batch_nid.py manifest.csv -o nid_results.jsonl
+
+A manifest is a CSV with an 'image' column (and an optional 'id' column) or a
+JSONL file with the same keys. Up to --concurrency extractions are kept in
+flight; each result or error is appended to the output JSONL file as soon as it
+completes.
+"""
+
+import argparse
+import asyncio
+import csv
+import fnmatch
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from image_io import MIME_TYPE_MAP
+from nid_recog import get_nid_info_async
+
+# Print a progress line every this many completed images
+PROGRESS_EVERY = 50
+
+
+def list_inputs(source: str, pattern: str = "*") -> List[Dict[str, str]]:
+    """
+    List the images to process from a directory or a manifest file.
+
+    Args:
+        source (str): Directory of images, or a .csv/.jsonl manifest
+        pattern (str): Filename glob applied when source is a directory
+
+    Returns:
+        List[Dict[str, str]]: 'id' and 'image' for each input
+
+    Raises:
+        ValueError: If the manifest format or a row is invalid
+    """
+    if os.path.isdir(source):
+        names = sorted(
+            name for name in os.listdir(source)
+            if fnmatch.fnmatch(name, pattern) and os.path.splitext(name)[1].lower() in MIME_TYPE_MAP
+        )
+        return [{'id': name, 'image': os.path.join(source, name)} for name in names]
+
+    _, extension = os.path.splitext(source)
+    extension = extension.lower()
+    if extension == '.csv':
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+    elif extension in ('.jsonl', '.json'):
+        with open(source, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        raise ValueError(f"Unsupported manifest format: {extension}. Use a directory, .csv or .jsonl")
+
+    inputs = []
+    for line_number, row in enumerate(rows, start=1):
+        if not row.get('image'):
+            raise ValueError(f"Manifest row {line_number} must have 'image'")
+        inputs.append({'id': str(row.get('id') or row['image']), 'image': row['image']})
+    return inputs
+
+
+async def run_batch(inputs: List[Dict[str, str]], output_path: str, concurrency: int = 8,
+                    use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Extract NID fields for every input with a bounded number of requests in flight.
+
+    Args:
+        inputs (List[Dict[str, str]]): Inputs from list_inputs
+        output_path (str): JSONL file that results are streamed to, in completion order
+        concurrency (int): Maximum number of extractions in flight
+        use_cache (bool): Set to False to bypass the NID result cache
+
+    Returns:
+        Dict[str, Any]: Run summary with counts, elapsed time and throughput
+    """
+    queue = asyncio.Queue()
+    for item in inputs:
+        queue.put_nowait(item)
+
+    summary = {'completed': 0, 'failed': 0, 'elapsed': 0.0, 'images_per_sec': 0.0}
+    start_time = time.time()
+
+    with open(output_path, 'w', encoding='utf-8') as out:
+
+        async def worker():
+            # Each worker keeps one request in flight until the queue is empty
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                item_start = time.time()
+                record = dict(item)
+                timings = {}
+                try:
+                    record['nid_info'] = await get_nid_info_async(item['image'], use_cache=use_cache,
+                                                                  timings=timings)
+                    record['status'] = 'ok'
+                    summary['completed'] += 1
+                except Exception as e:
+                    record['status'] = 'error'
+                    record['error_type'] = type(e).__name__
+                    record['error'] = str(e)
+                    summary['failed'] += 1
+                    print(f"FAILED {item['id']}: {record['error_type']}: {record['error']}", file=sys.stderr)
+                record['latency'] = time.time() - item_start
+                record['timings'] = timings
+
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+
+                processed = summary['completed'] + summary['failed']
+                if processed % PROGRESS_EVERY == 0:
+                    elapsed = time.time() - start_time
+                    print(f"{processed}/{len(inputs)} images processed, {processed / elapsed:.2f} images/sec")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    summary['elapsed'] = time.time() - start_time
+    processed = summary['completed'] + summary['failed']
+    summary['images_per_sec'] = processed / summary['elapsed'] if summary['elapsed'] > 0 else 0.0
+    return summary
+
+
+def main():
+    """Parse command line arguments and run the batch."""
+    parser = argparse.ArgumentParser(description="Concurrent batch NID extraction.")
+    parser.add_argument("source", help="Directory of NID images, or a CSV/JSONL manifest with an 'image' column")
+    parser.add_argument("-o", "--output", default="nid_results.jsonl", help="Results JSONL file")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--pattern", default="*", help="Filename glob when source is a directory")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the NID result cache")
+    args = parser.parse_args()
+
+    inputs = list_inputs(args.source, args.pattern)
+    print(f"Processing {len(inputs)} images with concurrency {args.concurrency}")
+
+    try:
+        summary = asyncio.run(run_batch(inputs, args.output, args.concurrency, not args.no_cache))
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+        sys.exit(1)
+
+    print(f"Completed: {summary['completed']}, failed: {summary['failed']}")
+    print(f"Elapsed: {summary['elapsed']:.1f}s, throughput: {summary['images_per_sec']:.2f} images/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Bulk face verification over a manifest of (NID photo, selfie) pairs.
+
+Usage:
+    python batch_verify.py pairs.csv -o results.jsonl --workers 4 --resume
+
+The manifest is a CSV with 'img1' and 'img2' columns (and an optional 'id'
+column) or a JSONL file with the same keys. It is read as the run goes, and
+invalid rows are recorded as failed pairs. Each worker process loads and warms
+the face models once, then verifies pairs until the manifest is exhausted.
+Results are appended to the output JSONL file as they complete.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Iterator, Set
+import numpy as np
+
+# Maximum number of submitted-but-unfinished pairs per worker, so a huge
+# manifest is streamed instead of queued all at once
+IN_FLIGHT_PER_WORKER = 4
+
+# How many times a pool whose worker died is replaced before the run gives up
+MAX_POOL_RESTARTS = 3
+
+# Print a progress line every this many completed pairs
+PROGRESS_EVERY = 100
+
+
+def read_manifest(manifest_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read the pairs listed in a CSV or JSONL manifest, one row at a time.
+
+    Invalid rows do not stop the run: they are yielded with an 'error' message
+    and recorded as failed pairs.
+
+    Args:
+        manifest_path (str): Path to a .csv or .jsonl/.json manifest
+
+    Returns:
+        Iterator[Dict[str, Any]]: 'id', 'img1' and 'img2' for each pair, plus
+            'error' for an invalid row
+
+    Raises:
+        ValueError: If the manifest format is not supported
+        OSError: If the manifest cannot be opened
+    """
+    _, extension = os.path.splitext(manifest_path)
+    extension = extension.lower()
+    if extension not in ('.csv', '.jsonl', '.json'):
+        raise ValueError(f"Unsupported manifest format: {extension}. Use .csv or .jsonl")
+
+    # Opened here so a missing file fails before any output is written
+    f = open(manifest_path, 'r', encoding='utf-8', newline='' if extension == '.csv' else None)
+    return _read_pairs(f, extension)
+
+
+def _read_rows(f, extension: str) -> Iterator[Any]:
+    # Yields each manifest row; a JSONL line that is not valid JSON becomes None
+    if extension == '.csv':
+        yield from csv.DictReader(f)
+        return
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+
+
+def _read_pairs(f, extension: str) -> Iterator[Dict[str, Any]]:
+    with f:
+        for line_number, row in enumerate(_read_rows(f, extension), start=1):
+            if not isinstance(row, dict):
+                yield {'id': f"row-{line_number}", 'img1': None, 'img2': None,
+                       'error': f"Manifest row {line_number} is not a JSON object"}
+            elif not row.get('img1') or not row.get('img2'):
+                yield {'id': str(row.get('id') or f"row-{line_number}"), 'img1': row.get('img1'),
+                       'img2': row.get('img2'), 'error': f"Manifest row {line_number} must have 'img1' and 'img2'"}
+            else:
+                yield {
+                    'id': str(row.get('id') or f"{row['img1']}|{row['img2']}"),
+                    'img1': row['img1'],
+                    'img2': row['img2']
+                }
+
+
+def read_checkpoint(output_path: str, retry_failed: bool = False) -> Set[str]:
+    """
+    Collect the IDs of pairs already recorded in an output file.
+
+    Args:
+        output_path (str): Results JSONL written by a previous run
+        retry_failed (bool): If True, failed pairs are not treated as done
+
+    Returns:
+        Set[str]: IDs of pairs to skip
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if retry_failed and record.get('status') != 'ok':
+                continue
+            done.add(record['id'])
+    return done
+
+
+def _init_worker() -> None:
+    # Runs once in each worker process: load and warm the models up front
+    import model_registry
+    from face_recog import MODEL_NAME, DETECTOR_BACKEND
+    model_registry.preload(MODEL_NAME, DETECTOR_BACKEND)
+
+
+def _verify_pair(pair: Dict[str, str]) -> Dict[str, Any]:
+    # Runs in a worker process; failures are returned, not raised
+    from face_recog import detect_face
+
+    record = dict(pair)
+    try:
+        results = detect_face(pair['img1'], pair['img2'])
+        # Drop the cropped faces, keep everything JSON-serializable
+        record.update({k: v for k, v in results.items() if not isinstance(v, np.ndarray)})
+        record['status'] = 'ok'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error_type'] = type(e).__name__
+        record['error'] = str(e)
+    return record
+
+
+def run_batch(manifest_path: str, output_path: str, workers: int = None,
+              resume: bool = False, retry_failed: bool = False) -> Dict[str, Any]:
+    """
+    Verify every pair in a manifest on a pool of warm worker processes.
+
+    Args:
+        manifest_path (str): CSV or JSONL manifest of pairs
+        output_path (str): JSONL file that results are streamed to
+        workers (int): Number of worker processes (default: CPU count)
+        resume (bool): Skip pairs already present in output_path and append to it
+        retry_failed (bool): When resuming, run previously failed pairs again
+
+    Returns:
+        Dict[str, Any]: Run summary with counts, elapsed time and throughput
+    """
+    workers = workers or os.cpu_count() or 1
+    done = read_checkpoint(output_path, retry_failed) if resume else set()
+    pairs = (pair for pair in read_manifest(manifest_path) if pair['id'] not in done)
+
+    summary = {'completed': 0, 'failed': 0, 'skipped': len(done), 'elapsed': 0.0, 'pairs_per_sec': 0.0}
+    start_time = time.time()
+
+    # TensorFlow is not fork-safe, so workers are started fresh
+    context = multiprocessing.get_context('spawn')
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+
+    pool = new_pool()
+    restarts = 0
+    pending = {}
+
+    def submit_more(out):
+        while len(pending) < workers * IN_FLIGHT_PER_WORKER:
+            pair = next(pairs, None)
+            if pair is None:
+                return
+            if 'error' in pair:
+                # An invalid manifest row fails on its own; the run goes on
+                write_record(dict(pair, status='error', error_type='ValueError'), out)
+                continue
+            pending[pool.submit(_verify_pair, pair)] = pair
+
+    def record_result(future, out):
+        pair = pending.pop(future)
+        try:
+            record = future.result()
+        except Exception as e:
+            # The worker itself died (e.g. out of memory)
+            record = dict(pair, status='error', error_type=type(e).__name__, error=str(e))
+        write_record(record, out)
+
+    def write_record(record, out):
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+
+        if record['status'] == 'ok':
+            summary['completed'] += 1
+        else:
+            summary['failed'] += 1
+            print(f"FAILED {record['id']}: {record['error_type']}: {record['error']}", file=sys.stderr)
+
+        processed = summary['completed'] + summary['failed']
+        if processed % PROGRESS_EVERY == 0:
+            elapsed = time.time() - start_time
+            print(f"{processed} pairs processed, {processed / elapsed:.2f} pairs/sec")
+
+    try:
+        with open(output_path, 'a' if resume else 'w', encoding='utf-8') as out:
+            submit_more(out)
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pool_broken = any(isinstance(future.exception(), BrokenProcessPool) for future in finished)
+                if pool_broken:
+                    # Every pair still pending on a broken pool fails as well
+                    finished, _ = wait(pending)
+                for future in finished:
+                    record_result(future, out)
+
+                if pool_broken:
+                    # Replace the pool and carry on with the rest of the manifest
+                    if restarts >= MAX_POOL_RESTARTS:
+                        raise RuntimeError(f"Worker pool failed {restarts + 1} times, giving up. "
+                                           "Re-run with --resume --retry-failed after fixing the cause.")
+                    restarts += 1
+                    print(f"Worker pool broke, restarting ({restarts}/{MAX_POOL_RESTARTS})", file=sys.stderr)
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = new_pool()
+                submit_more(out)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    summary['elapsed'] = time.time() - start_time
+    processed = summary['completed'] + summary['failed']
+    summary['pairs_per_sec'] = processed / summary['elapsed'] if summary['elapsed'] > 0 else 0.0
+    return summary
+
+
+def main():
+    """Parse command line arguments and run the batch."""
+    parser = argparse.ArgumentParser(description="Bulk face verification over a manifest of image pairs.")
+    parser.add_argument("manifest", help="CSV or JSONL manifest with img1, img2 and optional id")
+    parser.add_argument("-o", "--output", default="verification_results.jsonl", help="Results JSONL file")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--resume", action="store_true", help="Skip pairs already in the output file")
+    parser.add_argument("--retry-failed", action="store_true", help="With --resume, run failed pairs again")
+    args = parser.parse_args()
+
+    try:
+        summary = run_batch(args.manifest, args.output, args.workers, args.resume, args.retry_failed)
+    except KeyboardInterrupt:
+        print("\nStopped by user. Re-run with --resume to continue.")
+        sys.exit(1)
+
+    print(f"Completed: {summary['completed']}, failed: {summary['failed']}, "
+          f"skipped: {summary['skipped']}")
+    print(f"Elapsed: {summary['elapsed']:.1f}s, throughput: {summary['pairs_per_sec']:.2f} pairs/sec")
+
+
+if __name__ == "__main__":
+    main()
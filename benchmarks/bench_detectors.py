@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Per-backend face detector report over the bundled images.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_detectors
+    python -m benchmarks.bench_detectors --backends opencv,ssd,mtcnn,retinaface --repeats 5
+
+For every backend: load time, detection latency percentiles, hit rate (images
+with at least one face) and the confidence of the largest face. Then the
+configured cascade (FACE_DETECTOR_CASCADE) is run over the same images to show
+which tier each image ends up on. Use it to pick the cascade order and the
+per-tier minimum confidences.
+"""
+
+import argparse
+import glob
+import os
+import time
+from collections import Counter
+
+import cv2
+
+import face_recog
+import model_registry
+from benchmarks.common import IMAGES_DIR, latency_summary, peak_rss_mb, write_results
+
+
+def bench_backend(backend, images, repeats):
+    """Measure one detector backend over the decoded images."""
+    start_time = time.perf_counter()
+    model_registry.get_detector(backend)
+    load_time = time.perf_counter() - start_time
+
+    latencies = []
+    per_image = {}
+    for name, img in images.items():
+        for _ in range(repeats):
+            call_start = time.perf_counter()
+            try:
+                faces = face_recog._extract_faces(img, backend)
+            except ValueError:
+                faces = []
+            latencies.append(time.perf_counter() - call_start)
+        face = face_recog._get_largest_face(faces)
+        per_image[name] = {
+            'faces': len(faces),
+            'confidence': float(face['confidence']) if face is not None else None
+        }
+
+    hits = sum(1 for result in per_image.values() if result['faces'])
+    return {
+        'load_seconds': load_time,
+        'latency': latency_summary(latencies),
+        'hit_rate': hits / len(images),
+        'images': per_image
+    }
+
+
+def bench_cascade(images):
+    """Run the configured cascade and record the winning tier per image."""
+    tiers = Counter()
+    per_image = {}
+    latencies = []
+    for name, img in images.items():
+        call_start = time.perf_counter()
+        try:
+            _, _, backend = face_recog._detect_with_cascade(img)
+        except ValueError:
+            backend = None
+        latencies.append(time.perf_counter() - call_start)
+        tiers[backend or 'none'] += 1
+        per_image[name] = backend
+    return {
+        'cascade': face_recog._CASCADE_KEY,
+        'latency': latency_summary(latencies),
+        'tiers': dict(tiers),
+        'images': per_image
+    }
+
+
+def main():
+    """Run the report, print a summary table and write the JSON results."""
+    parser = argparse.ArgumentParser(description="Per-backend face detector latency and hit rate.")
+    parser.add_argument("--images", default=os.path.join(IMAGES_DIR, "*"), help="Glob of images")
+    parser.add_argument("--backends", default="opencv,ssd,mtcnn,retinaface",
+                        help="Comma-separated DeepFace detector backends")
+    parser.add_argument("--repeats", type=int, default=3, help="Detections per image and backend")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    images = {}
+    for path in sorted(glob.glob(args.images)):
+        img = cv2.imread(path)
+        if img is not None:
+            images[os.path.basename(path)] = img
+    if not images:
+        raise SystemExit(f"No images match {args.images}")
+
+    results = {'backends': {}}
+    print(f"{'backend':<12} {'load s':>8} {'p50 ms':>8} {'p90 ms':>8} {'hit rate':>9}")
+    for backend in [name.strip() for name in args.backends.split(',') if name.strip()]:
+        try:
+            report = bench_backend(backend, images, args.repeats)
+        except Exception as e:
+            print(f"{backend:<12} unavailable: {type(e).__name__}: {e}")
+            results['backends'][backend] = {'error': f"{type(e).__name__}: {e}"}
+            continue
+        results['backends'][backend] = report
+        print(f"{backend:<12} {report['load_seconds']:>8.2f} {report['latency']['p50'] * 1000:>8.1f} "
+              f"{report['latency']['p90'] * 1000:>8.1f} {report['hit_rate']:>9.0%}")
+
+    results['cascade'] = bench_cascade(images)
+    print(f"Cascade {results['cascade']['cascade']}: tiers {results['cascade']['tiers']}, "
+          f"p50 {results['cascade']['latency']['p50'] * 1000:.1f} ms")
+    results['peak_rss_mb'] = peak_rss_mb()
+
+    print(f"Results written to {write_results('detectors', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark detect_face over the bundled images.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_face
+    python -m benchmarks.bench_face --repeats 5 --output results/face.json
+
+Measures:
+  - cold start: a fresh interpreter importing face_recog and running its first
+    comparison (model load included), repeated --cold-runs times
+  - warm latency percentiles and throughput over every pair of sample images
+    after the models are preloaded
+  - peak RSS of both
+
+The embedding cache is disabled unless --cache is given, so every call pays
+for detection and inference.
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import IMAGES_DIR, REPO_ROOT, latency_summary, peak_rss_mb, write_results
+
+DEFAULT_PATTERNS = ("shakib_*", "mashrafe_*", "nid_*")
+
+# Runs in a fresh interpreter; prints one JSON line
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import face_recog
+imported = time.perf_counter()
+face_recog.detect_face(sys.argv[1], sys.argv[2])
+finished = time.perf_counter()
+from benchmarks.common import peak_rss_mb
+print(json.dumps({'import_seconds': imported - start, 'first_call_seconds': finished - imported,
+                  'total_seconds': finished - start, 'peak_rss_mb': peak_rss_mb()}))
+"""
+
+
+def sample_images(patterns=DEFAULT_PATTERNS):
+    """Return the sample image paths matching the given filename globs."""
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(os.path.join(IMAGES_DIR, pattern))))
+    return paths
+
+
+def measure_cold_start(img1, img2, runs):
+    """Time import + first detect_face in fresh interpreters."""
+    env = dict(os.environ, FACE_EMBEDDING_CACHE_DIR="", FACE_EMBEDDING_CACHE_SIZE="0")
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT, img1, img2], cwd=REPO_ROOT,
+                                   env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Cold start run failed:\n{completed.stderr}")
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {
+        'runs': runs,
+        'import': latency_summary([s['import_seconds'] for s in samples]),
+        'first_call': latency_summary([s['first_call_seconds'] for s in samples]),
+        'total': latency_summary([s['total_seconds'] for s in samples]),
+        'peak_rss_mb': max(s['peak_rss_mb'] for s in samples)
+    }
+
+
+def measure_warm(pairs, repeats, use_cache):
+    """Time detect_face over every pair after preloading the models."""
+    import embedding_cache
+    import model_registry
+    from face_recog import detect_face, MODEL_NAME, DETECTOR_BACKEND
+
+    if not use_cache:
+        embedding_cache.set_cache(embedding_cache.EmbeddingCache(cache_dir=None, max_entries=0))
+    model_registry.preload(MODEL_NAME, DETECTOR_BACKEND)
+
+    latencies = []
+    errors = Counter()
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        for img1, img2 in pairs:
+            call_start = time.perf_counter()
+            try:
+                detect_face(img1, img2)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        'pairs': len(pairs),
+        'repeats': repeats,
+        'latency': latency_summary(latencies),
+        'throughput_pairs_per_sec': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'errors': dict(errors),
+        'cache': embedding_cache.get_cache().get_stats(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def main():
+    """Run the benchmark, print a summary and write the JSON results."""
+    parser = argparse.ArgumentParser(description="Benchmark detect_face over the sample images.")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over all pairs in the warm phase")
+    parser.add_argument("--cold-runs", type=int, default=3, help="Fresh-interpreter cold start runs")
+    parser.add_argument("--cache", action="store_true", help="Leave the embedding cache enabled")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    images = sample_images()
+    pairs = list(itertools.combinations(images, 2))
+    if not pairs:
+        raise SystemExit(f"No sample images found in {IMAGES_DIR}")
+
+    results = {}
+    if args.cold_runs > 0:
+        results['cold_start'] = measure_cold_start(images[0], images[1], args.cold_runs)
+        cold = results['cold_start']
+        print(f"Cold start: import p50 {cold['import']['p50']:.2f}s, first call p50 "
+              f"{cold['first_call']['p50']:.2f}s, peak RSS {cold['peak_rss_mb']:.0f} MB")
+
+    results['warm'] = measure_warm(pairs, args.repeats, args.cache)
+    warm = results['warm']
+    latency = warm['latency']
+    if latency['count']:
+        print(f"Warm: {latency['count']} calls, p50 {latency['p50'] * 1000:.0f} ms, p90 {latency['p90'] * 1000:.0f} ms, "
+              f"p99 {latency['p99'] * 1000:.0f} ms, {warm['throughput_pairs_per_sec']:.2f} pairs/sec, "
+              f"peak RSS {warm['peak_rss_mb']:.0f} MB")
+    if warm['errors']:
+        print(f"Errors: {warm['errors']}")
+
+    print(f"Results written to {write_results('face', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
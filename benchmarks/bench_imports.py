@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Import-time report for the Streamlit app's startup and each tab's first use.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_imports
+    python -m benchmarks.bench_imports --runs 5 --top 15
+
+Every scenario imports its modules in a fresh interpreter under
+`python -X importtime`, so nothing is shared between them. Reported per
+scenario: total import time, peak RSS and the slowest imports (cumulative
+time, as in the -X importtime output). 'startup' is what interface.py imports
+before the first render, including nid_recog for the sidebar's key pool
+status; 'eager_startup' is what it imported before the heavy modules were made
+lazy. Each scenario also lists which of the heavy modules (TensorFlow,
+DeepFace, the Gemini SDK) ended up loaded, which for 'startup' should be none.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.common import REPO_ROOT, latency_summary, write_results
+
+# Modules interface.py imports at the top of the script, plus nid_recog which
+# the sidebar imports during the first render
+STARTUP_MODULES = ["streamlit", "PIL.Image", "numpy", "model_registry", "embedding_cache", "metrics", "nid_recog"]
+
+# Slow imports that should only load when a tab first needs them
+HEAVY_MODULES = ["tensorflow", "deepface", "google.generativeai"]
+
+SCENARIOS = {
+    'startup': STARTUP_MODULES,
+    'nid_tab': ["nid_recog"],
+    'nid_first_request': ["nid_recog", "google.generativeai"],
+    'face_tab': ["face_recog"],
+    'onboarding_tab': ["kyc_pipeline"],
+    'eager_startup': STARTUP_MODULES + ["face_recog", "kyc_pipeline", "google.generativeai"]
+}
+
+# Runs in a fresh interpreter; prints one JSON line
+IMPORT_SCRIPT = """
+import json, sys, time
+heavy, modules = sys.argv[1].split(","), sys.argv[2:]
+start = time.perf_counter()
+for name in modules:
+    # An import statement, so -X importtime reports the top-level module too
+    exec(f"import {name}")
+elapsed = time.perf_counter() - start
+from benchmarks.common import peak_rss_mb
+print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak_rss_mb(),
+                  'heavy_loaded': [name for name in heavy if name in sys.modules]}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output.
+
+    Returns:
+        tuple: Cumulative import seconds per module, and the nesting depth at
+            which each module was imported
+    """
+    cumulative = {}
+    depth = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        module = name.strip()
+        cumulative[module] = int(cumulative_us) / 1e6
+        depth[module] = (len(name) - len(name.lstrip())) // 2
+    return cumulative, depth
+
+
+def measure(modules, runs):
+    """Import the modules in fresh interpreters and summarize the runs."""
+    seconds = []
+    peak_rss = []
+    slowest = defaultdict(list)
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT,
+                                    ",".join(HEAVY_MODULES), *modules],
+                                   cwd=REPO_ROOT, capture_output=True, text=True)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"
+            return {'modules': modules, 'error': error}
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        seconds.append(sample['seconds'])
+        peak_rss.append(sample['peak_rss_mb'])
+        cumulative, depth = parse_importtime(completed.stderr)
+        for module, value in cumulative.items():
+            # Top-level and first-level imports say where the time goes
+            # without listing every submodule
+            if depth[module] <= 1:
+                slowest[module].append(value)
+
+    per_module = {module: sum(values) / len(values) for module, values in slowest.items()}
+    return {
+        'modules': modules,
+        'import': latency_summary(seconds),
+        'peak_rss_mb': max(peak_rss),
+        'heavy_loaded': sample['heavy_loaded'],
+        'imports': dict(sorted(per_module.items(), key=lambda item: -item[1]))
+    }
+
+
+def main():
+    """Run every scenario, print the report and write the JSON results."""
+    parser = argparse.ArgumentParser(description="Import time and memory of app startup and each tab.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-interpreter runs per scenario")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to print per scenario")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    results = {}
+    for name, modules in SCENARIOS.items():
+        report = results[name] = measure(modules, args.runs)
+        if 'error' in report:
+            print(f"{name}: failed ({report['error']})")
+            continue
+        print(f"{name}: {report['import']['p50']:.2f}s p50, peak RSS {report['peak_rss_mb']:.0f} MB, "
+              f"heavy modules loaded: {', '.join(report['heavy_loaded']) or 'none'}")
+        for module, seconds in list(report['imports'].items())[:args.top]:
+            print(f"  {seconds * 1000:>9.1f} ms  {module}")
+
+    if 'error' not in results['startup'] and 'error' not in results['eager_startup']:
+        saved = results['eager_startup']['import']['p50'] - results['startup']['import']['p50']
+        print(f"Lazy startup saves {saved:.2f}s and "
+              f"{results['eager_startup']['peak_rss_mb'] - results['startup']['peak_rss_mb']:.0f} MB")
+
+    print(f"Results written to {write_results('imports', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
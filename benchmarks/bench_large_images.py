@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+detect_face latency and memory on large photos, at full resolution versus
+with reduced-resolution decoding and detection.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_large_images
+    python -m benchmarks.bench_large_images --megapixels 24 --max-side 1280
+
+The sample images are upscaled to phone-camera size (--megapixels) and saved
+as JPEGs. Each mode runs in a fresh interpreter, since FACE_DETECT_MAX_SIDE is
+read at import: 'full' sets it to 0, 'reduced' to --max-side. Reported per
+mode: latency percentiles, peak RSS and how much the peak grew over the
+requests (after the models were loaded). The embedding cache is disabled.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import cv2
+
+from benchmarks.bench_face import sample_images
+from benchmarks.common import REPO_ROOT, write_results
+
+# Runs in a fresh interpreter; prints one JSON line
+MODE_SCRIPT = """
+import itertools, json, sys, time
+import embedding_cache, face_recog, model_registry
+from benchmarks.common import latency_summary, peak_rss_mb
+
+embedding_cache.set_cache(embedding_cache.EmbeddingCache(cache_dir=None, max_entries=0))
+model_registry.preload(face_recog.MODEL_NAME, face_recog.DETECTOR_BACKEND)
+loaded_rss = peak_rss_mb()
+
+paths, repeats = sys.argv[2:], int(sys.argv[1])
+latencies, errors = [], 0
+for _ in range(repeats):
+    for img1, img2 in itertools.combinations(paths, 2):
+        start = time.perf_counter()
+        try:
+            face_recog.detect_face(img1, img2)
+        except ValueError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+print(json.dumps({'latency': latency_summary(latencies), 'errors': errors,
+                  'peak_rss_mb': peak_rss_mb(), 'request_rss_growth_mb': peak_rss_mb() - loaded_rss}))
+"""
+
+
+def make_large_images(paths, megapixels, output_dir):
+    """Upscale each image to about the given size and save it as a JPEG."""
+    large = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        scale = (megapixels * 1e6 / (img.shape[0] * img.shape[1])) ** 0.5
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        large_path = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + ".jpg")
+        cv2.imwrite(large_path, img, [cv2.IMWRITE_JPEG_QUALITY, 92])
+        large.append(large_path)
+    return large
+
+
+def run_mode(max_side, paths, repeats):
+    """Run the requests in a fresh interpreter with the given detection size."""
+    env = dict(os.environ, FACE_DETECT_MAX_SIDE=str(max_side), FACE_EMBEDDING_CACHE_DIR="",
+               FACE_EMBEDDING_CACHE_SIZE="0")
+    completed = subprocess.run([sys.executable, "-c", MODE_SCRIPT, str(repeats), *paths], cwd=REPO_ROOT,
+                               env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Run with FACE_DETECT_MAX_SIDE={max_side} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Run both modes, print the comparison and write the JSON results."""
+    parser = argparse.ArgumentParser(description="detect_face on large photos: full vs reduced resolution.")
+    parser.add_argument("--megapixels", type=float, default=12, help="Size the sample images are upscaled to")
+    parser.add_argument("--max-side", type=int, default=1600, help="FACE_DETECT_MAX_SIDE for the reduced mode")
+    parser.add_argument("--images", type=int, default=4, help="Sample images to use (all pairs are compared)")
+    parser.add_argument("--repeats", type=int, default=2, help="Passes over all pairs")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        paths = make_large_images(sample_images()[:args.images], args.megapixels, output_dir)
+        if len(paths) < 2:
+            raise SystemExit("Need at least two sample images")
+        pairs = len(list(itertools.combinations(paths, 2)))
+
+        results = {'megapixels': args.megapixels, 'images': len(paths), 'pairs': pairs, 'repeats': args.repeats}
+        for mode, max_side in (('full', 0), ('reduced', args.max_side)):
+            report = results[mode] = dict(run_mode(max_side, paths, args.repeats), max_side=max_side)
+            latency = report['latency']
+            if latency['count']:
+                print(f"{mode:<8} p50 {latency['p50'] * 1000:>7.0f} ms  p90 {latency['p90'] * 1000:>7.0f} ms  "
+                      f"peak RSS {report['peak_rss_mb']:.0f} MB (+{report['request_rss_growth_mb']:.0f} MB "
+                      f"during requests)")
+
+    print(f"Results written to {write_results('large_images', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark get_nid_info offline against the local Gemini stand-in.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_nid
+    python -m benchmarks.bench_nid --latency 2.0 --throttle-rate 0.1 --concurrency 16 --requests 200
+
+The real Gemini API is replaced by benchmarks.fake_gemini.FakeGeminiClient and
+the key pool by one built from fake keys, so no network or API keys are used.
+The result cache is bypassed. Runs a sequential pass with get_nid_info and a
+concurrent pass with get_nid_info_async, and reports latency percentiles,
+throughput, errors by type and per-key statistics.
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import time
+from collections import Counter
+
+import nid_recog
+from key_pool import KeyPool
+from benchmarks.common import IMAGES_DIR, latency_summary, peak_rss_mb, write_results
+from benchmarks.fake_gemini import FakeGeminiClient
+
+
+def run_sequential(images, count, preprocess):
+    """Call get_nid_info count times, cycling through the images."""
+    latencies = []
+    errors = Counter()
+    start_time = time.perf_counter()
+    for i in range(count):
+        call_start = time.perf_counter()
+        try:
+            nid_recog.get_nid_info(images[i % len(images)], use_cache=False, preprocess=preprocess)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+            continue
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start_time
+    return {
+        'requests': count,
+        'latency': latency_summary(latencies),
+        'throughput_per_sec': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'errors': dict(errors)
+    }
+
+
+async def run_concurrent(images, count, concurrency, preprocess):
+    """Run count get_nid_info_async calls with at most concurrency in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = Counter()
+
+    async def one(i):
+        async with semaphore:
+            call_start = time.perf_counter()
+            try:
+                await nid_recog.get_nid_info_async(images[i % len(images)], use_cache=False, preprocess=preprocess)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                return
+            latencies.append(time.perf_counter() - call_start)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - start_time
+    return {
+        'requests': count,
+        'concurrency': concurrency,
+        'latency': latency_summary(latencies),
+        'throughput_per_sec': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'errors': dict(errors)
+    }
+
+
+def main():
+    """Run the benchmark, print a summary and write the JSON results."""
+    parser = argparse.ArgumentParser(description="Benchmark get_nid_info against a local Gemini stand-in.")
+    parser.add_argument("--images", default=os.path.join(IMAGES_DIR, "nid_*"), help="Glob of NID images")
+    parser.add_argument("--latency", type=float, default=1.5, help="Mean simulated round trip, seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Standard deviation of the round trip")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Probability of a simulated 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.05, help="Probability of a simulated 429")
+    parser.add_argument("--keys", type=int, default=3, help="Number of fake API keys in the pool")
+    parser.add_argument("--rpm", type=float, default=600, help="Requests per minute per key")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="Cool-down for throttled keys, seconds")
+    parser.add_argument("--sequential", type=int, default=10, help="Requests in the sequential pass")
+    parser.add_argument("--requests", type=int, default=100, help="Requests in the concurrent pass")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight in the concurrent pass")
+    parser.add_argument("--preprocess", action="store_true", help="Preprocess images before upload")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the stand-in")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    images = sorted(glob.glob(args.images))
+    if not images:
+        raise SystemExit(f"No images match {args.images}")
+
+    fake_client = FakeGeminiClient(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                   throttle_rate=args.throttle_rate, seed=args.seed)
+    key_pool = KeyPool([f"fake-key-{i:02d}-local" for i in range(args.keys)], args.rpm, args.cooldown)
+    previous_client = nid_recog.set_gemini_client(fake_client)
+    previous_pool = nid_recog.set_key_pool(key_pool)
+
+    try:
+        results = {'config': vars(args)}
+        results['sequential'] = run_sequential(images, args.sequential, args.preprocess)
+        results['concurrent'] = asyncio.run(run_concurrent(images, args.requests, args.concurrency, args.preprocess))
+        results['stand_in'] = dict(fake_client.stats)
+        results['key_pool'] = key_pool.get_stats()
+        results['peak_rss_mb'] = peak_rss_mb()
+    finally:
+        nid_recog.set_gemini_client(previous_client)
+        nid_recog.set_key_pool(previous_pool)
+
+    for name in ('sequential', 'concurrent'):
+        phase = results[name]
+        latency = phase['latency']
+        if latency['count']:
+            print(f"{name.title()}: {latency['count']}/{phase['requests']} ok, p50 {latency['p50']:.2f}s, "
+                  f"p90 {latency['p90']:.2f}s, p99 {latency['p99']:.2f}s, {phase['throughput_per_sec']:.2f} req/sec")
+        if phase['errors']:
+            print(f"  errors: {phase['errors']}")
+    print(f"Stand-in: {results['stand_in']}")
+
+    print(f"Results written to {write_results('nid', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark NID upload preprocessing over the bundled images/nid_* samples.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_nid_preprocess
+    python -m benchmarks.bench_nid_preprocess --gemini --repeats 3
+
+Without --gemini only the local side is measured: preprocessing time and the
+upload size before and after. With --gemini each sample is also sent to Gemini
+(bypassing the result cache) with and without preprocessing, and the median
+round-trip latency of each is reported. That needs configured API keys.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+
+import nid_preprocess
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images")
+
+
+def _median_latency(fn, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start_time)
+    return statistics.median(latencies)
+
+
+def main():
+    """Run the benchmark and print a per-image table."""
+    parser = argparse.ArgumentParser(description="Benchmark NID upload preprocessing.")
+    parser.add_argument("--images", default=os.path.join(IMAGES_DIR, "nid_*"), help="Glob of NID images")
+    parser.add_argument("--repeats", type=int, default=5, help="Repetitions per measurement")
+    parser.add_argument("--gemini", action="store_true", help="Also measure Gemini latency (needs API keys)")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.gemini:
+        from nid_recog import get_nid_info
+
+    rows = []
+    for path in sorted(glob.glob(args.images)):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        _, _, record = nid_preprocess.preprocess_nid_image(data)
+        row = {
+            'image': os.path.basename(path),
+            'original_bytes': record['original_bytes'],
+            'processed_bytes': record['processed_bytes'],
+            'original_size': record['original_size'],
+            'processed_size': record['processed_size'],
+            'cropped': record['cropped'],
+            'preprocess_seconds': _median_latency(lambda: nid_preprocess.preprocess_nid_image(data), args.repeats)
+        }
+
+        if args.gemini:
+            row['gemini_raw_seconds'] = _median_latency(
+                lambda: get_nid_info(path, use_cache=False, preprocess=False), args.repeats)
+            row['gemini_preprocessed_seconds'] = _median_latency(
+                lambda: get_nid_info(path, use_cache=False, preprocess=True), args.repeats)
+        rows.append(row)
+
+    print(f"{'image':<14} {'original':>10} {'processed':>10} {'saved':>7} {'crop':>5} {'prep ms':>8}", end="")
+    print(f" {'raw s':>7} {'prep s':>7}" if args.gemini else "")
+    for row in rows:
+        saved = 1 - row['processed_bytes'] / row['original_bytes']
+        print(f"{row['image']:<14} {row['original_bytes']:>10} {row['processed_bytes']:>10} {saved:>7.1%} "
+              f"{'yes' if row['cropped'] else 'no':>5} {row['preprocess_seconds'] * 1000:>8.1f}", end="")
+        print(f" {row['gemini_raw_seconds']:>7.2f} {row['gemini_preprocessed_seconds']:>7.2f}" if args.gemini else "")
+
+    original_total = sum(row['original_bytes'] for row in rows)
+    processed_total = sum(row['processed_bytes'] for row in rows)
+    if original_total:
+        print(f"\nTotal: {original_total} -> {processed_total} bytes "
+              f"({1 - processed_total / original_total:.1%} smaller)")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Single-request detect_face latency with the two images analyzed one after the
+other versus side by side.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_parallel
+    python -m benchmarks.bench_parallel --repeats 10 --workers 4
+
+Both modes run in the same process over the same pairs, alternating per pair
+so thermal and cache effects hit both equally. The embedding cache is disabled
+so every call decodes, detects and embeds. The gain depends on free cores:
+expect little on a single-core host.
+"""
+
+import argparse
+import itertools
+import os
+import time
+
+from benchmarks.bench_face import sample_images
+from benchmarks.common import latency_summary, peak_rss_mb, write_results
+
+
+def main():
+    """Run both modes, print the speedup and write the JSON results."""
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent per-image analysis in detect_face.")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over all pairs")
+    parser.add_argument("--workers", type=int, default=4, help="FACE_IMAGE_WORKERS for the concurrent mode")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    import embedding_cache
+    import face_recog
+    import model_registry
+
+    pairs = list(itertools.combinations(sample_images(), 2))
+    if not pairs:
+        raise SystemExit("No sample images found")
+
+    embedding_cache.set_cache(embedding_cache.EmbeddingCache(cache_dir=None, max_entries=0))
+    model_registry.preload(face_recog.MODEL_NAME, face_recog.DETECTOR_BACKEND)
+
+    modes = {'sequential': 0, 'concurrent': args.workers}
+    latencies = {mode: [] for mode in modes}
+    branches = {mode: [] for mode in modes}
+    errors = 0
+    for _ in range(args.repeats):
+        for img1, img2 in pairs:
+            for mode, workers in modes.items():
+                face_recog.FACE_IMAGE_WORKERS = workers
+                call_start = time.perf_counter()
+                try:
+                    result = face_recog.detect_face(img1, img2)
+                except ValueError:
+                    errors += 1
+                    continue
+                latencies[mode].append(time.perf_counter() - call_start)
+                branches[mode].append(max(result['timings']['image1']['total'],
+                                          result['timings']['image2']['total']))
+
+    results = {
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'pairs': len(pairs),
+        'repeats': args.repeats,
+        'errors': errors,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    for mode in modes:
+        results[mode] = {'latency': latency_summary(latencies[mode]),
+                         'slowest_branch': latency_summary(branches[mode])}
+        latency = results[mode]['latency']
+        if latency['count']:
+            print(f"{mode:<11} p50 {latency['p50'] * 1000:>7.1f} ms  p90 {latency['p90'] * 1000:>7.1f} ms  "
+                  f"({latency['count']} calls)")
+
+    if latencies['sequential'] and latencies['concurrent']:
+        results['speedup_p50'] = results['sequential']['latency']['p50'] / results['concurrent']['latency']['p50']
+        print(f"Speedup at p50: {results['speedup_p50']:.2f}x on {os.cpu_count()} CPUs")
+
+    print(f"Results written to {write_results('parallel', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Helpers shared by the benchmark scripts: percentiles, peak memory and JSON
+result files that carry enough metadata to compare runs.
+"""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(REPO_ROOT, "images")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, Any]:
+    """
+    Summarize a list of latencies in seconds.
+
+    Returns:
+        Dict[str, Any]: 'count', 'mean', 'min', 'p50', 'p90', 'p99' and 'max'
+    """
+    if not latencies:
+        return {'count': 0}
+    values = np.asarray(latencies, dtype=np.float64)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        'count': int(values.size),
+        'mean': float(values.mean()),
+        'min': float(values.min()),
+        'p50': float(p50),
+        'p90': float(p90),
+        'p99': float(p99),
+        'max': float(values.max())
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Describe the environment a benchmark ran in."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def write_results(name: str, results: Dict[str, Any], output_path: str = None) -> str:
+    """
+    Write benchmark results, with run metadata, to a JSON file.
+
+    Args:
+        name (str): Benchmark name, used for the default file name
+        results (Dict[str, Any]): Measurements
+        output_path (str): Destination file (default: benchmarks/results/<name>-<time>.json)
+
+    Returns:
+        str: The path written
+    """
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    document = {'benchmark': name, 'metadata': run_metadata(), 'results': results}
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    return output_path
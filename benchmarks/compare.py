@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files.
+
+Usage (from the repository root):
+    python -m benchmarks.compare benchmarks/results/face-A.json benchmarks/results/face-B.json
+
+Prints every numeric measurement present in both files with the relative
+change from the baseline (first file) to the candidate (second file).
+"""
+
+import argparse
+import json
+
+
+def flatten(value, prefix=""):
+    """Flatten nested dicts into {'a.b.c': number} for numeric leaves."""
+    flat = {}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            flat.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = value
+    return flat
+
+
+def main():
+    """Print a side-by-side comparison of two result files."""
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline", help="Baseline results JSON")
+    parser.add_argument("candidate", help="Candidate results JSON")
+    args = parser.parse_args()
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, 'r', encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['metadata'].get('git_commit')} {baseline['metadata']['timestamp']}")
+    print(f"candidate: {candidate['metadata'].get('git_commit')} {candidate['metadata']['timestamp']}")
+
+    before = flatten(baseline['results'])
+    after = flatten(candidate['results'])
+    width = max((len(name) for name in before if name in after), default=10)
+    for name in sorted(before):
+        if name not in after or name.startswith('config.'):
+            continue
+        change = (after[name] - before[name]) / before[name] if before[name] else float('nan')
+        print(f"{name:<{width}} {before[name]:>12.4f} {after[name]:>12.4f} {change:>+8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Local stand-in for the Gemini API, for benchmarking get_nid_info offline.
+
+Install it with nid_recog.set_gemini_client(FakeGeminiClient(...)). Each call
+sleeps for a simulated round trip and then either returns a canned NID response
+or raises an error that looks like the SDK's (a 429 for throttling, a 503 for
+server errors) so the key pool's retry and cool-down paths are exercised.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_RESPONSE = {
+    'Name': 'TEST NAME',
+    'Name_Bangla': None,
+    'Date_of_Birth': '01 Jan 1990',
+    'NID_Number': '1234567890',
+    "Father's Name": None,
+    "Mother's Name": None
+}
+
+
+class SimulatedAPIError(Exception):
+    """Error raised by the stand-in, carrying an HTTP status like google.api_core errors."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeGeminiClient:
+    """
+    Gemini stand-in with configurable latency, errors and throttling.
+
+    Latency is drawn from a normal distribution (clipped at zero) plus a
+    per-megabyte upload cost, so preprocessing still shows up in the numbers.
+    """
+
+    def __init__(self, latency: float = 1.5, jitter: float = 0.3, seconds_per_mb: float = 0.4,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 response: Optional[Dict[str, Any]] = None, seed: Optional[int] = None):
+        """
+        Args:
+            latency (float): Mean round-trip time in seconds
+            jitter (float): Standard deviation of the round-trip time
+            seconds_per_mb (float): Extra latency per MB of image data
+            error_rate (float): Probability of a simulated 503
+            throttle_rate (float): Probability of a simulated 429
+            response (Dict[str, Any]): JSON returned on success
+            seed (int): Random seed for reproducible runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.seconds_per_mb = seconds_per_mb
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.response_text = json.dumps(response or DEFAULT_RESPONSE, ensure_ascii=False)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'errors': 0, 'throttled': 0, 'bytes': 0}
+
+    def _plan(self, image_data) -> tuple:
+        # Decide the latency and outcome of one call
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['bytes'] += len(image_data)
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+            delay += len(image_data) / (1024 * 1024) * self.seconds_per_mb
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                self.stats['throttled'] += 1
+                error = SimulatedAPIError(429, "Resource has been exhausted (e.g. check quota).")
+                delay = min(delay, 0.05)  # throttles are rejected quickly
+            elif roll < self.throttle_rate + self.error_rate:
+                self.stats['errors'] += 1
+                error = SimulatedAPIError(503, "The service is currently unavailable.")
+            else:
+                error = None
+        return delay, error
+
+    def generate(self, api_key: str, image_data, mime_type: str, prompt: str = None) -> str:
+        """Simulate a blocking generate_content call."""
+        delay, error = self._plan(image_data)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return self.response_text
+
+    async def generate_async(self, api_key: str, image_data, mime_type: str, prompt: str = None) -> str:
+        """Simulate an async generate_content call."""
+        delay, error = self._plan(image_data)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return self.response_text
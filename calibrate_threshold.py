@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Calibrate the face verification threshold on a labeled image set.
+
+Usage:
+    python calibrate_threshold.py images/ --exclude "nid_*"
+    python calibrate_threshold.py labeled_faces/ --criterion far --target-far 0.001 --report roc.json
+
+Each image's identity is its filename prefix: 'shakib_01.jpg' and
+'shakib_02.png' are the same person, 'mashrafe_01.jpg' another. Every image
+is embedded once, all pairwise cosine distances come from a single matrix
+product, and FAR/FRR are computed for every candidate threshold. The chosen
+threshold is written to the face config (FACE_CONFIG_PATH, default
+face_config.json), which detect_face loads at import.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Identity label: everything before the trailing '_<number>' of the file name
+LABEL_PATTERN = re.compile(r'^(.+?)[_-]\d+$')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff', '.tif', '.gif')
+
+# Thresholds reported in the ROC table; the recommended threshold is chosen
+# from the exact midpoints between observed distances instead
+ROC_GRID = np.round(np.arange(0.0, 1.0001, 0.01), 2)
+
+
+def label_from_filename(path: str) -> str:
+    """Return the identity label of an image, e.g. 'shakib' for 'shakib_01.jpg'."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = LABEL_PATTERN.match(stem)
+    return match.group(1) if match else stem
+
+
+def list_images(image_dir: str, exclude: List[str]) -> List[str]:
+    """List the images in a directory, skipping names matching any exclude glob."""
+    paths = []
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        if any(fnmatch.fnmatch(name, pattern) for pattern in exclude):
+            continue
+        paths.append(os.path.join(image_dir, name))
+    return paths
+
+
+def embed_images(paths: List[str]) -> Tuple[np.ndarray, List[str], Dict[str, str]]:
+    """
+    Embed every image once.
+
+    Returns:
+        Tuple[np.ndarray, List[str], Dict[str, str]]: L2-normalized embeddings
+            (one row per embedded image), the paths that were embedded and the
+            error for each image that was skipped
+    """
+    import model_registry
+    from face_recog import extract_embedding, MODEL_NAME, DETECTOR_BACKEND
+
+    model_registry.preload(MODEL_NAME, DETECTOR_BACKEND)
+
+    rows = []
+    embedded = []
+    failures = {}
+    for path in paths:
+        try:
+            rows.append(np.asarray(extract_embedding(path), dtype=np.float64))
+            embedded.append(path)
+        except (ValueError, FileNotFoundError) as e:
+            failures[path] = str(e)
+    if not rows:
+        return np.empty((0, 0)), embedded, failures
+
+    embeddings = np.stack(rows)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings, embedded, failures
+
+
+def pair_distances(embeddings: np.ndarray, labels: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the cosine distance of every unordered pair with one matrix product.
+
+    Args:
+        embeddings (np.ndarray): L2-normalized embeddings, one row per image
+        labels (List[str]): Identity of each row
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Distances of genuine (same identity) and
+            impostor (different identity) pairs
+    """
+    distances = 1.0 - embeddings @ embeddings.T
+    labels = np.asarray(labels)
+    same = labels[:, None] == labels[None, :]
+    upper = np.triu_indices(len(labels), k=1)
+    return distances[upper][same[upper]], distances[upper][~same[upper]]
+
+
+def error_rates(genuine: np.ndarray, impostor: np.ndarray,
+                thresholds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    FAR and FRR at each threshold, where a pair matches when distance < threshold.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: False accept rate (impostor pairs
+            accepted) and false reject rate (genuine pairs rejected)
+    """
+    genuine = np.sort(genuine)
+    impostor = np.sort(impostor)
+    far = np.searchsorted(impostor, thresholds, side='left') / max(len(impostor), 1)
+    frr = 1.0 - np.searchsorted(genuine, thresholds, side='left') / max(len(genuine), 1)
+    return far, frr
+
+
+def calibrate(genuine: np.ndarray, impostor: np.ndarray, criterion: str = 'eer',
+              target_far: float = 0.001) -> Dict[str, Any]:
+    """
+    Choose a threshold from genuine and impostor pair distances.
+
+    Candidates are the midpoints between consecutive observed distances, so the
+    choice is exact for the sample rather than limited to a grid.
+
+    Args:
+        genuine (np.ndarray): Same-identity pair distances
+        impostor (np.ndarray): Different-identity pair distances
+        criterion (str): 'eer' for the equal error rate point, or 'far' for the
+            most permissive threshold whose FAR does not exceed target_far
+        target_far (float): FAR limit for the 'far' criterion
+
+    Returns:
+        Dict[str, Any]: 'threshold', its 'far' and 'frr', the 'eer', 'auc' and
+            the ROC table ('roc': threshold, far, frr per grid point)
+    """
+    if len(genuine) == 0 or len(impostor) == 0:
+        raise ValueError("Calibration needs at least one genuine and one impostor pair; "
+                         "check that several images share each identity prefix")
+
+    observed = np.unique(np.concatenate([genuine, impostor]))
+    candidates = np.concatenate([[observed[0] - 1e-6], (observed[:-1] + observed[1:]) / 2, [observed[-1] + 1e-6]])
+    far, frr = error_rates(genuine, impostor, candidates)
+
+    # Ties (e.g. a gap with no errors at all) are broken by taking the middle
+    # one, leaving the most margin on both sides
+    gap = np.abs(far - frr)
+    ties = np.flatnonzero(gap == gap.min())
+    eer_index = int(ties[len(ties) // 2])
+    eer = float((far[eer_index] + frr[eer_index]) / 2)
+
+    if criterion == 'eer':
+        index = eer_index
+    elif criterion == 'far':
+        allowed = np.flatnonzero(far <= target_far)
+        index = int(allowed[-1])  # the lowest candidate always has FAR 0
+    else:
+        raise ValueError(f"Unknown criterion: {criterion}")
+
+    # Area under the ROC curve (true accept rate against FAR)
+    order = np.argsort(far, kind='stable')
+    accept, false_accept = 1.0 - frr[order], far[order]
+    auc = float(np.sum(np.diff(false_accept) * (accept[1:] + accept[:-1]) / 2))
+
+    grid_far, grid_frr = error_rates(genuine, impostor, ROC_GRID)
+    return {
+        'threshold': float(candidates[index]),
+        'far': float(far[index]),
+        'frr': float(frr[index]),
+        'eer': eer,
+        'auc': auc,
+        'roc': [{'threshold': float(t), 'far': float(a), 'frr': float(r)}
+                for t, a, r in zip(ROC_GRID, grid_far, grid_frr)]
+    }
+
+
+def main():
+    """Parse command line arguments, calibrate and write the config."""
+    parser = argparse.ArgumentParser(description="Calibrate the face verification threshold on labeled images.")
+    parser.add_argument("images", help="Directory of images named <identity>_<number>.<ext>")
+    parser.add_argument("--exclude", action="append", default=[],
+                        help="Glob of file names to skip (repeatable), e.g. 'nid_*'")
+    parser.add_argument("--criterion", choices=['eer', 'far'], default='eer',
+                        help="Pick the equal error rate point, or the loosest threshold within --target-far")
+    parser.add_argument("--target-far", type=float, default=0.001, help="FAR limit for --criterion far")
+    parser.add_argument("--config", default=None, help="Face config to write (default: FACE_CONFIG_PATH)")
+    parser.add_argument("--report", help="Also write the full report (ROC table, per-image errors) as JSON")
+    parser.add_argument("--dry-run", action="store_true", help="Print the result without writing the config")
+    args = parser.parse_args()
+
+    paths = list_images(args.images, args.exclude)
+    if not paths:
+        sys.exit(f"No images found in {args.images}")
+
+    start_time = time.time()
+    embeddings, embedded, failures = embed_images(paths)
+    embed_time = time.time() - start_time
+    for path, error in failures.items():
+        print(f"SKIPPED {path}: {error}", file=sys.stderr)
+
+    labels = [label_from_filename(path) for path in embedded]
+    genuine, impostor = pair_distances(embeddings, labels)
+    try:
+        result = calibrate(genuine, impostor, args.criterion, args.target_far)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    from face_recog import MODEL_NAME, THRESHOLD, FACE_CONFIG_PATH, FACE_DETECT_MAX_SIDE, _CASCADE_KEY
+    current_far, current_frr = error_rates(genuine, impostor, np.array([THRESHOLD]))
+
+    print(f"Embedded {len(embedded)} images ({len(set(labels))} identities) in {embed_time:.1f}s; "
+          f"{len(genuine)} genuine and {len(impostor)} impostor pairs")
+    print(f"Genuine distance:  mean {genuine.mean():.4f}, max {genuine.max():.4f}")
+    print(f"Impostor distance: mean {impostor.mean():.4f}, min {impostor.min():.4f}")
+    print(f"Current threshold {THRESHOLD:.4f}: FAR {current_far[0]:.4%}, FRR {current_frr[0]:.4%}")
+    print(f"Recommended ({args.criterion}) {result['threshold']:.4f}: FAR {result['far']:.4%}, "
+          f"FRR {result['frr']:.4%}; EER {result['eer']:.4%}, AUC {result['auc']:.4f}")
+
+    calibration = {
+        'criterion': args.criterion,
+        'target_far': args.target_far if args.criterion == 'far' else None,
+        'far': result['far'],
+        'frr': result['frr'],
+        'eer': result['eer'],
+        'auc': result['auc'],
+        'images': len(embedded),
+        'identities': len(set(labels)),
+        'genuine_pairs': int(len(genuine)),
+        'impostor_pairs': int(len(impostor)),
+        'detector_cascade': _CASCADE_KEY,
+        'detect_max_side': FACE_DETECT_MAX_SIDE,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'threshold': result['threshold'], 'calibration': calibration,
+                       'roc': result['roc'], 'skipped': failures}, f, indent=2)
+        print(f"Report written to {args.report}")
+
+    if not args.dry_run:
+        config_path = args.config or FACE_CONFIG_PATH
+        config = {
+            'threshold': result['threshold'],
+            'model_name': MODEL_NAME,
+            'distance_metric': 'cosine',
+            'calibration': calibration
+        }
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        print(f"Threshold written to {config_path}")
+
+
+if __name__ == "__main__":
+    main()
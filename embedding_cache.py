@@ -0,0 +1,280 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Union
+import numpy as np
+
+# Where the persistent tier lives and how many entries the memory tier holds
+DEFAULT_CACHE_DIR = os.getenv("FACE_EMBEDDING_CACHE_DIR", ".embedding_cache")
+DEFAULT_MAX_ENTRIES = int(os.getenv("FACE_EMBEDDING_CACHE_SIZE", "1024"))
+# Files kept in the persistent tier, and the age after which one is deleted
+DEFAULT_DISK_MAX_ENTRIES = int(os.getenv("FACE_EMBEDDING_CACHE_DISK_SIZE", "10000"))
+DEFAULT_TTL_SECONDS = float(os.getenv("FACE_EMBEDDING_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# The disk tier is pruned on start and after this many writes
+_PRUNE_EVERY = 64
+
+
+def make_key(image_bytes: Union[bytes, memoryview, np.ndarray], model_name: str,
+             detector_backend: str) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        image_bytes (Union[bytes, memoryview, np.ndarray]): Raw (encoded) image
+            bytes, or a decoded image array
+        model_name (str): Recognition model that produced the embedding
+        detector_backend (str): Detector backend used to find the face
+
+    Returns:
+        str: Hex digest identifying the image/model/detector combination
+    """
+    digest = hashlib.sha256()
+    if isinstance(image_bytes, np.ndarray):
+        # Hash the pixels in place; the shape and dtype tell layouts apart
+        digest.update(f"{image_bytes.shape}|{image_bytes.dtype}|".encode("utf-8"))
+        image_bytes = np.ascontiguousarray(image_bytes)
+    digest.update(image_bytes)
+    digest.update(f"|{model_name}|{detector_backend}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of per-image face analysis results.
+
+    Each entry holds the 'embedding', the 'cropped' face, its 'facial_area' in
+    the decoded image, 'faces_detected' and the 'detector' that found the face
+    for one image. The memory tier is a bounded LRU. The disk tier keeps one
+    .npz file per key so entries survive restarts, without the face crop: a
+    disk hit returns the box instead, and the caller cuts the crop again and
+    stores the completed entry with put(..., persist=False). Disk entries
+    expire after ttl_seconds, and beyond disk_max_entries the least recently
+    used files are deleted.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 disk_max_entries: int = DEFAULT_DISK_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Args:
+            cache_dir (str): Directory for the on-disk tier, or None for memory only
+            max_entries (int): Maximum number of entries in the memory tier
+            disk_max_entries (int): Maximum number of files in the on-disk tier
+            ttl_seconds (float): Age after which an on-disk entry is deleted
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'disk_evictions': 0}
+        self._writes = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.prune()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        # Caller holds the lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry. A disk hit has no 'cropped' face (see the class docstring).
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached entry, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return dict(entry)
+
+        path = self._path(key) if self.cache_dir else None
+        if path and os.path.exists(path):
+            entry = None
+            try:
+                written_at = os.stat(path).st_mtime
+                if time.time() - written_at > self.ttl_seconds:
+                    os.remove(path)
+                else:
+                    with np.load(path) as data:
+                        x, y, w, h = (int(value) for value in data['facial_area'])
+                        entry = {
+                            'embedding': data['embedding'],
+                            'facial_area': {'x': x, 'y': y, 'w': w, 'h': h},
+                            'faces_detected': int(data['faces_detected']),
+                            'detector': str(data['detector'])
+                        }
+                    # The access time orders files for eviction; the modification
+                    # time stays the write time the TTL counts from
+                    os.utime(path, (time.time(), written_at))
+            except (OSError, ValueError, KeyError):
+                # A truncated or corrupt file (or one from an older version) is
+                # treated as a miss and rewritten
+                entry = None
+
+            if entry is not None:
+                _freeze(entry)
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+                return dict(entry)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key: str, entry: Dict[str, Any], persist: bool = True) -> None:
+        """
+        Store an entry in the memory tier and, unless persist is False, on disk.
+
+        Args:
+            key (str): Key from make_key
+            entry (Dict[str, Any]): 'embedding', 'cropped', 'facial_area',
+                'faces_detected' and 'detector'
+            persist (bool): Also write the entry to the disk tier
+        """
+        area = entry['facial_area']
+        entry = {
+            'embedding': np.asarray(entry['embedding'], dtype=np.float32),
+            'cropped': np.asarray(entry['cropped']),
+            'facial_area': {name: int(area[name]) for name in ('x', 'y', 'w', 'h')},
+            'faces_detected': int(entry['faces_detected']),
+            'detector': str(entry['detector'])
+        }
+        _freeze(entry)
+
+        with self._lock:
+            self._remember(key, entry)
+            if persist:
+                self._writes += 1
+            prune = persist and self._writes % _PRUNE_EVERY == 0
+
+        if self.cache_dir and persist:
+            # Face crops stay in memory; the disk tier keeps what is needed to
+            # skip detection and embedding
+            area = entry['facial_area']
+            # Write to a temporary file first so readers never see a partial entry
+            tmp_path = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, embedding=entry['embedding'],
+                         facial_area=np.array([area['x'], area['y'], area['w'], area['h']], dtype=np.int64),
+                         faces_detected=entry['faces_detected'], detector=entry['detector'])
+            os.replace(tmp_path, self._path(key))
+            if prune:
+                self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete expired disk entries, then the least recently used ones beyond
+        disk_max_entries.
+
+        Returns:
+            int: Number of files deleted
+        """
+        if not self.cache_dir:
+            return 0
+        now = time.time()
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for dir_entry in entries:
+                    if dir_entry.name.endswith('.npz'):
+                        try:
+                            stat = dir_entry.stat()
+                        except OSError:
+                            continue
+                        files.append((stat.st_atime, stat.st_mtime, dir_entry.path))
+        except OSError:
+            return 0
+
+        expired = [path for _, written_at, path in files if now - written_at > self.ttl_seconds]
+        kept = sorted(entry for entry in files if now - entry[1] <= self.ttl_seconds)
+        overflow = [path for _, _, path in kept[:max(0, len(kept) - self.disk_max_entries)]]
+
+        removed = 0
+        for path in expired + overflow:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass  # Already removed by another process
+        with self._lock:
+            self._stats['disk_evictions'] += removed
+        return removed
+
+    def clear(self) -> None:
+        """Drop the memory tier and reset the counters (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'disk_evictions': 0}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters for the cache.
+
+        Returns:
+            Dict[str, Any]: 'memory_hits', 'disk_hits', 'hits', 'misses',
+            'hit_rate', 'memory_entries' and 'disk_evictions'
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._entries)
+        stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+def _freeze(entry: Dict[str, Any]) -> None:
+    # Entries are shared between callers, so their arrays are made read-only
+    for value in entry.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, creating it on first use."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = EmbeddingCache()
+    return _default_cache
+
+
+def set_cache(cache: Optional[EmbeddingCache]) -> Optional[EmbeddingCache]:
+    """
+    Replace the process-wide embedding cache.
+
+    Args:
+        cache (EmbeddingCache): The cache to use, or None to create the default
+            one again on next use
+
+    Returns:
+        Optional[EmbeddingCache]: The previously installed cache
+    """
+    global _default_cache
+    with _default_cache_lock:
+        previous, _default_cache = _default_cache, cache
+    return previous
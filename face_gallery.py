@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+from face_recog import extract_embedding, THRESHOLD
+from image_io import ImageSource
+
+DEFAULT_GALLERY_DIR = os.getenv("FACE_GALLERY_DIR", "face_gallery")
+EMBEDDING_DIM = 512  # FaceNet512
+
+# Supported storage types for the embedding matrix. int8 rows are the unit
+# vector scaled by INT8_SCALE and rounded.
+SUPPORTED_DTYPES = ('float32', 'float16', 'int8')
+INT8_SCALE = 127.0
+
+# Rows scored per matrix product; bounds the temporary float32 copy needed for
+# float16/int8 storage
+SEARCH_CHUNK_ROWS = 65536
+
+
+class FaceGallery:
+    """
+    Gallery of enrolled customer faces for 1:N identification.
+
+    Embeddings are L2-normalized and stored as one contiguous row-major matrix in
+    'embeddings.bin', which is memory-mapped for search. Customer IDs are kept
+    in 'ids.jsonl' (one per row) and 'gallery.json' records the dtype,
+    dimension and row count. New rows are appended in place.
+    """
+
+    def __init__(self, gallery_dir: str = DEFAULT_GALLERY_DIR, dtype: str = 'float32',
+                 dim: int = EMBEDDING_DIM):
+        """
+        Open a gallery, creating it if the directory is empty.
+
+        Args:
+            gallery_dir (str): Directory holding the gallery files
+            dtype (str): Storage type for new galleries: 'float32', 'float16' or 'int8'
+            dim (int): Embedding dimension for new galleries
+
+        Raises:
+            ValueError: If dtype is unsupported or the gallery files are inconsistent
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported gallery dtype: {dtype}. Supported: {', '.join(SUPPORTED_DTYPES)}")
+
+        self.gallery_dir = gallery_dir
+        self._header_path = os.path.join(gallery_dir, 'gallery.json')
+        self._matrix_path = os.path.join(gallery_dir, 'embeddings.bin')
+        self._ids_path = os.path.join(gallery_dir, 'ids.jsonl')
+        self._lock = threading.Lock()
+        self._matrix = None
+
+        os.makedirs(gallery_dir, exist_ok=True)
+
+        if os.path.exists(self._header_path):
+            with open(self._header_path, 'r', encoding='utf-8') as f:
+                header = json.load(f)
+            self.dtype = header['dtype']
+            self.dim = header['dim']
+            self.count = header['count']
+        else:
+            self.dtype = dtype
+            self.dim = dim
+            self.count = 0
+            self._write_header()
+
+        self._ids = self._load_ids()
+        self._discard_partial_append()
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * np.dtype(self.dtype).itemsize
+
+    def _write_header(self) -> None:
+        tmp_path = self._header_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dtype': self.dtype, 'dim': self.dim, 'count': self.count}, f)
+        os.replace(tmp_path, self._header_path)
+
+    def _load_ids(self) -> List[str]:
+        if not os.path.exists(self._ids_path):
+            return []
+        with open(self._ids_path, 'r', encoding='utf-8') as f:
+            ids = [json.loads(line) for line in f if line.strip()]
+        if len(ids) < self.count:
+            raise ValueError(f"Gallery {self.gallery_dir} is missing IDs: expected {self.count}, found {len(ids)}")
+        return ids
+
+    def _discard_partial_append(self) -> None:
+        # The header count is only updated after rows and IDs are written, so
+        # anything past it is left over from an interrupted append
+        expected_bytes = self.count * self._row_bytes
+        if os.path.exists(self._matrix_path) and os.path.getsize(self._matrix_path) > expected_bytes:
+            with open(self._matrix_path, 'r+b') as f:
+                f.truncate(expected_bytes)
+        if len(self._ids) > self.count:
+            self._ids = self._ids[:self.count]
+            with open(self._ids_path, 'w', encoding='utf-8') as f:
+                for customer_id in self._ids:
+                    f.write(json.dumps(customer_id, ensure_ascii=False) + '\n')
+
+    def _encode(self, embeddings: np.ndarray) -> np.ndarray:
+        # Normalize rows so that a dot product is the cosine similarity
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        if np.any(norms == 0):
+            raise ValueError("Cannot enroll a zero embedding")
+        embeddings = embeddings / norms
+        if self.dtype == 'int8':
+            return np.round(embeddings * INT8_SCALE).astype(np.int8)
+        return embeddings.astype(self.dtype)
+
+    def add(self, customer_ids: Sequence[str], embeddings: np.ndarray) -> None:
+        """
+        Append embeddings for one or more customers.
+
+        Args:
+            customer_ids (Sequence[str]): One ID per embedding row
+            embeddings (np.ndarray): Array of shape (n, dim) or (dim,)
+
+        Raises:
+            ValueError: If the number of IDs and embeddings differ
+        """
+        rows = self._encode(embeddings)
+        if len(customer_ids) != rows.shape[0]:
+            raise ValueError(f"Got {len(customer_ids)} IDs for {rows.shape[0]} embeddings")
+
+        with self._lock:
+            with open(self._matrix_path, 'ab') as f:
+                f.write(np.ascontiguousarray(rows).tobytes())
+            with open(self._ids_path, 'a', encoding='utf-8') as f:
+                for customer_id in customer_ids:
+                    f.write(json.dumps(str(customer_id), ensure_ascii=False) + '\n')
+
+            self._ids.extend(str(customer_id) for customer_id in customer_ids)
+            self.count += rows.shape[0]
+            self._write_header()
+            # Re-map on the next search to pick up the new rows
+            self._matrix = None
+
+    def enroll(self, customer_id: str, img: ImageSource) -> np.ndarray:
+        """
+        Enroll a customer from a face image.
+
+        Args:
+            customer_id (str): Customer identifier
+            img (ImageSource): The customer's face image (path, bytes or array)
+
+        Returns:
+            np.ndarray: The embedding that was stored
+        """
+        embedding = extract_embedding(img)
+        self.add([customer_id], embedding)
+        return embedding
+
+    def _get_matrix(self) -> Optional[np.ndarray]:
+        with self._lock:
+            if self._matrix is None and self.count > 0:
+                self._matrix = np.memmap(self._matrix_path, dtype=self.dtype, mode='r',
+                                         shape=(self.count, self.dim))
+            return self._matrix
+
+    def search(self, embedding: np.ndarray, k: int = 5,
+               threshold: float = THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Find the k enrolled faces closest to a probe embedding.
+
+        Args:
+            embedding (np.ndarray): Probe embedding
+            k (int): Number of candidates to return
+            threshold (float): Cosine distance below which a candidate is a match
+
+        Returns:
+            List[Dict[str, Any]]: Candidates ordered by distance, each with
+            'customer_id', 'distance' and 'match'
+        """
+        matrix = self._get_matrix()
+        if matrix is None or k <= 0:
+            return []
+
+        probe = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+        probe = probe / np.linalg.norm(probe)
+
+        # One matrix-vector product per chunk (a single product for float32)
+        if self.dtype == 'float32':
+            similarities = matrix @ probe
+        else:
+            similarities = np.empty(matrix.shape[0], dtype=np.float32)
+            for start in range(0, matrix.shape[0], SEARCH_CHUNK_ROWS):
+                chunk = matrix[start:start + SEARCH_CHUNK_ROWS].astype(np.float32)
+                similarities[start:start + SEARCH_CHUNK_ROWS] = chunk @ probe
+            if self.dtype == 'int8':
+                similarities /= INT8_SCALE
+
+        k = min(k, similarities.shape[0])
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+
+        candidates = []
+        for index in top:
+            distance = float(1.0 - similarities[index])
+            candidates.append({
+                'customer_id': self._ids[index],
+                'distance': distance,
+                'match': distance < threshold
+            })
+        return candidates
+
+    def identify(self, img: ImageSource, k: int = 5,
+                 threshold: float = THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Search the gallery for the face in an image.
+
+        Args:
+            img (ImageSource): The probe image (path, bytes or array)
+            k (int): Number of candidates to return
+            threshold (float): Cosine distance below which a candidate is a match
+
+        Returns:
+            List[Dict[str, Any]]: Candidates as returned by search()
+        """
+        return self.search(extract_embedding(img), k=k, threshold=threshold)
+
+    def __len__(self) -> int:
+        return self.count
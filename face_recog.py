@@ -1,136 +1,489 @@
 import cv2
 import numpy as np
 from deepface import DeepFace
+import model_registry
+import embedding_cache
+import image_io
+import metrics
+from micro_batcher import MicroBatcher
+from image_io import ImageSource
 import os
-from typing import Tuple, Dict, Any
+import json
+from typing import Tuple, Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
 import warnings
 warnings.filterwarnings('ignore')
 
-def detect_face(img1_path: str, img2_path: str) -> Dict[str, Any]:
+
+def parse_detector_cascade(spec: str) -> List[Tuple[str, float]]:
     """
-    Detect and compare faces in two images using DeepFace's FaceNet512 model.
-    
+    Parse a detector cascade such as "opencv,mtcnn:0.9,retinaface".
+
     Args:
-        img1_path (str): Path to the first image
-        img2_path (str): Path to the second image
-    
+        spec (str): Comma-separated DeepFace backends, cheapest first, each with
+            an optional minimum confidence after a colon (default 0)
+
     Returns:
-        Dict[str, Any]: Dictionary containing all analysis results and statistics
+        List[Tuple[str, float]]: (backend, min_confidence) tiers in order
     """
-    
-    # Verify that both image files exist
-    if not os.path.exists(img1_path):
-        raise FileNotFoundError(f"Image 1 not found: {img1_path}")
-    if not os.path.exists(img2_path):
-        raise FileNotFoundError(f"Image 2 not found: {img2_path}")
-    
-    # Start timing
-    start_time = time.time()
-    
-    # Initialize results dictionary
-    results = {
-        'verified': None,
-        'distance': None,
-        'threshold': 0.40,  # Custom threshold
-        'model_name': 'FaceNet512',
-        'distance_metric': 'cosine',
-        'faces_detected_img1': 0,
-        'faces_detected_img2': 0,
-        'processing_time': 0,
-        'face1_cropped': None,
-        'face2_cropped': None
-    }
-    
+    cascade = []
+    for tier in spec.split(','):
+        backend, _, min_confidence = tier.strip().partition(':')
+        if backend:
+            cascade.append((backend, float(min_confidence or 0)))
+    if not cascade:
+        raise ValueError(f"Empty detector cascade: {spec!r}")
+    return cascade
+
+
+def load_threshold(config_path: str, model_name: str, default: float) -> float:
+    """
+    Read the verification threshold from a calibration config file.
+
+    The file is written by calibrate_threshold.py. A missing file means the
+    default is used.
+
+    Args:
+        config_path (str): Path of the JSON config
+        model_name (str): Recognition model the threshold must have been
+            calibrated for
+        default (float): Threshold to use when there is no config file
+
+    Returns:
+        float: The cosine distance threshold
+
+    Raises:
+        ValueError: If the config is unreadable or was calibrated for another model
+    """
+    if not os.path.exists(config_path):
+        return default
     try:
-        # Step 1: Face Verification using FaceNet512 with custom threshold
-        verification_result = DeepFace.verify(
-            img1_path=img1_path,
-            img2_path=img2_path,
-            model_name="Facenet512",
-            enforce_detection=True,
-            detector_backend="opencv",
-            distance_metric="cosine"
-        )
-        
-        # Apply custom threshold
-        distance = verification_result['distance']
-        results['distance'] = distance
-        results['verified'] = distance < results['threshold']
-        
-        # Step 2: Extract face embeddings and count faces
-        # Load images
-        img1 = cv2.imread(img1_path)
-        img2 = cv2.imread(img2_path)
-        
-        # Convert BGR to RGB for display
-        img1_rgb = cv2.cvtColor(img1, cv2.COLOR_BGR2RGB)
-        img2_rgb = cv2.cvtColor(img2, cv2.COLOR_BGR2RGB)
-        
-        # Extract face embeddings using FaceNet512
-        embedding1 = DeepFace.represent(
-            img_path=img1_path,
-            model_name="Facenet512",
-            enforce_detection=True,
-            detector_backend="opencv"
-        )
-        
-        embedding2 = DeepFace.represent(
-            img_path=img2_path,
-            model_name="Facenet512",
-            enforce_detection=True,
-            detector_backend="opencv"
-        )
-        
-        # Count faces detected
-        results['faces_detected_img1'] = len(embedding1)
-        results['faces_detected_img2'] = len(embedding2)
-        
-        # Step 3: Extract cropped face regions
-        # Load the face cascade classifier for face detection
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        # Detect faces
-        gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
-        
-        faces1 = face_cascade.detectMultiScale(gray1, 1.1, 4)
-        faces2 = face_cascade.detectMultiScale(gray2, 1.1, 4)
-        
-        # Select the largest face from each image
-        def get_largest_face(faces):
-            if len(faces) == 0:
-                return None
-            # Sort by area (width * height) and return the largest
-            largest_face = max(faces, key=lambda x: x[2] * x[3])
-            return largest_face
-        
-        face1_bbox = get_largest_face(faces1)
-        face2_bbox = get_largest_face(faces2)
-        
-        # Extract cropped face regions
-        if face1_bbox is not None:
-            x, y, w, h = face1_bbox
-            face1_region = img1_rgb[y:y+h, x:x+w]
-            face1_region = cv2.resize(face1_region, (160, 160))
-            results['face1_cropped'] = face1_region
-        else:
-            results['face1_cropped'] = None
-            
-        if face2_bbox is not None:
-            x, y, w, h = face2_bbox
-            face2_region = img2_rgb[y:y+h, x:x+w]
-            face2_region = cv2.resize(face2_region, (160, 160))
-            results['face2_cropped'] = face2_region
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        threshold = float(config['threshold'])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid face config {config_path}: {e}")
+    if config.get('model_name', model_name) != model_name:
+        raise ValueError(f"Face config {config_path} was calibrated for {config['model_name']}, not {model_name}")
+    return threshold
+
+
+# Recognition settings shared by every step of the pipeline
+MODEL_NAME = "Facenet512"
+TARGET_SIZE = (160, 160)  # Facenet512 input size
+DEFAULT_THRESHOLD = 0.40  # Cosine distance threshold used without a calibration config
+FACE_CONFIG_PATH = os.getenv("FACE_CONFIG_PATH", "face_config.json")
+THRESHOLD = load_threshold(FACE_CONFIG_PATH, MODEL_NAME, DEFAULT_THRESHOLD)
+
+# Detector backends tried in order. A tier is accepted when its largest face
+# meets the tier's minimum confidence; later (slower, more accurate) tiers are
+# only loaded and run when the earlier ones find nothing or are not confident.
+# Confidence scales differ per backend: opencv reports unnormalized cascade
+# weights, mtcnn and retinaface a probability.
+DETECTOR_CASCADE = parse_detector_cascade(os.getenv("FACE_DETECTOR_CASCADE", "opencv,mtcnn,retinaface"))
+DETECTOR_BACKEND = DETECTOR_CASCADE[0][0]  # first tier, preloaded at startup
+# Identifies the cascade in embedding cache keys
+_CASCADE_KEY = ">".join(f"{backend}:{min_confidence:g}" for backend, min_confidence in DETECTOR_CASCADE)
+
+# Detection runs on a copy of each image whose long side is at most
+# FACE_DETECT_MAX_SIDE pixels; large JPEGs are decoded straight at a reduced
+# scale (1/2, 1/4 or 1/8) that still keeps that many pixels. The face is then
+# cropped from the decoded image with the box scaled back up. 0 decodes and
+# detects at full resolution.
+FACE_DETECT_MAX_SIDE = int(os.getenv("FACE_DETECT_MAX_SIDE", "1600"))
+# Identifies the detector settings in embedding cache keys
+_DETECTION_KEY = f"{_CASCADE_KEY}@{FACE_DETECT_MAX_SIDE}"
+
+# Faces embedded at the same time by concurrent callers are run through the
+# model as one batch. A batch is sent once it holds FACE_BATCH_MAX_SIZE faces
+# or its first face has waited FACE_BATCH_MAX_WAIT_MS; FACE_BATCHING=0 runs
+# every face on its own.
+FACE_BATCHING = os.getenv("FACE_BATCHING", "1") == "1"
+FACE_BATCH_MAX_SIZE = int(os.getenv("FACE_BATCH_MAX_SIZE", "16"))
+FACE_BATCH_MAX_WAIT_MS = float(os.getenv("FACE_BATCH_MAX_WAIT_MS", "2"))
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+# detect_face analyzes its two images side by side: the second in the calling
+# thread, the first on this shared pool. OpenCV and TensorFlow release the GIL,
+# so the branches use separate cores. FACE_IMAGE_WORKERS bounds the pool
+# across all concurrent requests; 0 analyzes the images one after the other.
+FACE_IMAGE_WORKERS = int(os.getenv("FACE_IMAGE_WORKERS", "4"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _extract_faces(img: np.ndarray, detector_backend: str = DETECTOR_BACKEND) -> List[Dict[str, Any]]:
+    """
+    Run one face detector once on a decoded image.
+
+    Each detection holds the aligned face ('face', RGB in [0, 1] at TARGET_SIZE),
+    its bounding box in the source image ('facial_area') and 'confidence'.
+
+    Args:
+        img (np.ndarray): Decoded BGR image
+        detector_backend (str): DeepFace detector backend
+
+    Returns:
+        List[Dict[str, Any]]: One entry per detected face
+
+    Raises:
+        ValueError: If no face is detected
+    """
+    return DeepFace.extract_faces(
+        img_path=img,
+        target_size=TARGET_SIZE,
+        detector_backend=detector_backend,
+        enforce_detection=True,
+        align=True
+    )
+
+
+def _get_largest_face(faces: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Return the detection with the largest bounding box area, or None."""
+    if len(faces) == 0:
+        return None
+    return max(faces, key=lambda f: f['facial_area']['w'] * f['facial_area']['h'])
+
+
+def _detect_with_cascade(img: np.ndarray) -> Tuple[List[Dict[str, Any]], Dict[str, Any], str]:
+    """
+    Detect faces with the cheapest detector tier that is confident enough.
+
+    If no tier meets its minimum confidence, the detections of the last tier
+    that found anything are used.
+
+    Args:
+        img (np.ndarray): Decoded BGR image
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Dict[str, Any], str]: All detections, the
+            largest one and the backend that produced them
+
+    Raises:
+        ValueError: If no tier detects a face
+    """
+    fallback = None
+    for backend, min_confidence in DETECTOR_CASCADE:
+        # Build the tier through the registry so concurrent first uses load it once
+        model_registry.get_detector(backend)
+        start_time = time.perf_counter()
+        try:
+            faces = _extract_faces(img, backend)
+        except ValueError:
+            faces = []
+        metrics.observe('face_detector_seconds', time.perf_counter() - start_time, backend=backend)
+
+        face = _get_largest_face(faces)
+        if face is None:
+            metrics.inc('face_detector_total', backend=backend, result='no_face')
+            continue
+        if face['confidence'] >= min_confidence:
+            metrics.inc('face_detector_total', backend=backend, result='accepted')
+            return faces, face, backend
+        metrics.inc('face_detector_total', backend=backend, result='low_confidence')
+        fallback = (faces, face, backend)
+
+    if fallback is not None:
+        return fallback
+    backends = ", ".join(backend for backend, _ in DETECTOR_CASCADE)
+    raise ValueError(f"Face could not be detected by any detector ({backends}). "
+                     "Please confirm that the picture is a face photo.")
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared per-image thread pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FACE_IMAGE_WORKERS, thread_name_prefix="face-image")
+        return _executor
+
+
+def _predict_batch(batch: np.ndarray) -> np.ndarray:
+    """Run a batch of BGR faces through the recognition model."""
+    return model_registry.get_model(MODEL_NAME).predict(batch, verbose=0)
+
+
+def _get_batcher() -> MicroBatcher:
+    """Return the shared embedding batcher, starting it on first use."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(_predict_batch, FACE_BATCH_MAX_SIZE, FACE_BATCH_MAX_WAIT_MS, name='face')
+    return _batcher
+
+
+def _represent(face: np.ndarray) -> np.ndarray:
+    """
+    Compute the FaceNet512 embedding of an aligned face.
+
+    With batching enabled the face joins whatever other faces are being
+    embedded at the same moment and is run through the model with them.
+
+    Args:
+        face (np.ndarray): Aligned RGB face in [0, 1] as returned by _extract_faces
+
+    Returns:
+        np.ndarray: 512-dimensional embedding
+    """
+    # DeepFace hands faces out as RGB but its models are fed BGR
+    face = face[:, :, ::-1]
+    if FACE_BATCHING:
+        return _get_batcher().predict(face)
+    return _predict_batch(np.expand_dims(face, axis=0))[0]
+
+
+def _detection_image(img: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Downscale an image for detection to at most FACE_DETECT_MAX_SIDE pixels.
+
+    Returns:
+        Tuple[np.ndarray, float]: The detection image and the factor that maps
+            its coordinates back to img (1.0 if img is used as is)
+    """
+    long_side = max(img.shape[:2])
+    if FACE_DETECT_MAX_SIDE <= 0 or long_side <= FACE_DETECT_MAX_SIDE:
+        return img, 1.0
+    scale = FACE_DETECT_MAX_SIDE / long_side
+    small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return small, long_side / max(small.shape[:2])
+
+
+def _scale_area(facial_area: Dict[str, int], factor: float, shape: Tuple[int, ...]) -> Dict[str, int]:
+    """Map a bounding box from detection coordinates to an image of the given shape."""
+    if factor == 1.0:
+        return facial_area
+    x = min(int(round(facial_area['x'] * factor)), shape[1] - 1)
+    y = min(int(round(facial_area['y'] * factor)), shape[0] - 1)
+    w = max(1, min(int(round(facial_area['w'] * factor)), shape[1] - x))
+    h = max(1, min(int(round(facial_area['h'] * factor)), shape[0] - y))
+    return {'x': x, 'y': y, 'w': w, 'h': h}
+
+
+def _crop_face(img: np.ndarray, facial_area: Dict[str, int]) -> np.ndarray:
+    """Crop a detected face region from a BGR image as a 160x160 RGB image."""
+    x, y, w, h = facial_area['x'], facial_area['y'], facial_area['w'], facial_area['h']
+    face_region = cv2.cvtColor(img[y:y+h, x:x+w], cv2.COLOR_BGR2RGB)
+    return cv2.resize(face_region, (160, 160))
+
+
+def _cosine_distance(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
+    """Cosine distance between two embedding vectors."""
+    a = np.asarray(embedding1, dtype=np.float64)
+    b = np.asarray(embedding2, dtype=np.float64)
+    return float(1.0 - np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def _analyze_image(source: ImageSource, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Decode, detect, crop and embed a single image in one pass.
+
+    Results are looked up in the embedding cache by image content first, so a
+    repeated image skips detection and inference entirely. Large images are
+    decoded and detected at reduced resolution (see FACE_DETECT_MAX_SIDE).
+
+    Args:
+        source (ImageSource): Path, encoded bytes, file-like object or BGR array
+        timings (Dict[str, float]): Optional dict filled with the seconds spent in
+            each stage ('read', 'cache_lookup', 'decode', 'detect', 'crop',
+            'embed', 'cache_store'); stages skipped by a cache hit are absent
+
+    Returns:
+        Dict[str, Any]: 'faces_detected', 'embedding', 'cropped' and
+            'facial_area' (in the decoded image) for the largest face, and the
+            'detector' backend that found it
+    """
+    with metrics.stage('face', 'read', timings):
+        if isinstance(source, np.ndarray):
+            img = source
+            data = source
         else:
-            results['face2_cropped'] = None
-        
-        # Calculate processing time
-        results['processing_time'] = time.time() - start_time
-        
-        return results
-        
-    except Exception as e:
-        # Calculate processing time even if error occurs
-        results['processing_time'] = time.time() - start_time
-        raise e
\ No newline at end of file
+            img = None
+            data = image_io.read_image_bytes(source)
+
+    cache = embedding_cache.get_cache()
+    with metrics.stage('face', 'cache_lookup', timings):
+        cache_key = embedding_cache.make_key(data, MODEL_NAME, _DETECTION_KEY)
+        analysis = cache.get(cache_key)
+    if analysis is not None and 'cropped' in analysis:
+        return analysis
+
+    if img is None:
+        with metrics.stage('face', 'decode', timings):
+            img = image_io.decode_image(data, source, min_side=FACE_DETECT_MAX_SIDE)
+        # Only the decoded image is needed from here on
+        data = None
+
+    # A disk cache hit has the embedding and the face box but not the crop,
+    # which is cut again without detecting or embedding
+    if analysis is not None:
+        with metrics.stage('face', 'crop', timings):
+            analysis['cropped'] = _crop_face(img, analysis['facial_area'])
+        with metrics.stage('face', 'cache_store', timings):
+            cache.put(cache_key, analysis, persist=False)
+        return analysis
+
+    with metrics.stage('face', 'detect', timings):
+        detection_img, factor = _detection_image(img)
+        faces, face, detector = _detect_with_cascade(detection_img)
+        del detection_img
+
+    # Crop before embedding so the decoded image is released before the face
+    # waits for its inference batch
+    with metrics.stage('face', 'crop', timings):
+        facial_area = _scale_area(face['facial_area'], factor, img.shape)
+        cropped = _crop_face(img, facial_area)
+        del img
+
+    with metrics.stage('face', 'embed', timings):
+        embedding = _represent(face['face'])
+
+    analysis = {
+        'faces_detected': len(faces),
+        'embedding': embedding,
+        'cropped': cropped,
+        'facial_area': facial_area,
+        'detector': detector
+    }
+    with metrics.stage('face', 'cache_store', timings):
+        cache.put(cache_key, analysis)
+    return analysis
+
+
+def extract_embedding(img: ImageSource) -> np.ndarray:
+    """
+    Compute the FaceNet512 embedding of the largest face in an image.
+
+    Args:
+        img (ImageSource): Path, encoded bytes, file-like object or BGR array
+
+    Returns:
+        np.ndarray: 512-dimensional embedding
+
+    Raises:
+        FileNotFoundError: If an image path does not exist
+        ValueError: If the image cannot be decoded or no face is detected
+    """
+    return _analyze_image(img)['embedding']
+
+
+def _analyze_branch(source: ImageSource, timings: Dict[str, float]) -> Dict[str, Any]:
+    """Analyze one image of a comparison and record the branch's wall-clock time as 'total'."""
+    start_time = time.perf_counter()
+    try:
+        return _analyze_image(source, timings)
+    finally:
+        timings['total'] = time.perf_counter() - start_time
+        metrics.observe('face_branch_seconds', timings['total'])
+
+
+def _analyze_pair(img1_path: ImageSource, img2_path: ImageSource,
+                  timings: Dict[str, Dict[str, float]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Analyze both images of a comparison, concurrently when the pool is enabled.
+
+    If both images fail, image 1's error is raised, as when they run in order.
+    """
+    if FACE_IMAGE_WORKERS <= 0:
+        return _analyze_branch(img1_path, timings['image1']), _analyze_branch(img2_path, timings['image2'])
+
+    future1 = _get_executor().submit(_analyze_branch, img1_path, timings['image1'])
+    try:
+        analysis2 = _analyze_branch(img2_path, timings['image2'])
+    except Exception:
+        future1.result()
+        raise
+    return future1.result(), analysis2
+
+
+def detect_face(img1_path: ImageSource, img2_path: ImageSource) -> Dict[str, Any]:
+    """
+    Detect and compare faces in two images using DeepFace's FaceNet512 model.
+
+    Each image is decoded once and passed through the detector cascade (see
+    DETECTOR_CASCADE); the same detections are used for counting, cropping and
+    embedding, and the cosine distance is computed locally from the two
+    embeddings. 'detector_img1' and 'detector_img2' record which backend found
+    each face.
+
+    Each image may be a file path, encoded image bytes (bytes, bytearray or
+    memoryview), a binary file-like object or a decoded BGR array.
+
+    The two images are analyzed concurrently (see FACE_IMAGE_WORKERS).
+
+    The 'timings' entry of the result breaks the run down into seconds per
+    stage for 'image1' and 'image2' (read, cache_lookup, decode, detect, crop,
+    embed, cache_store, and the branch's wall-clock 'total'), plus 'compare' and
+    'total'. The same durations are recorded in the metrics registry.
+
+    Args:
+        img1_path (ImageSource): The first image
+        img2_path (ImageSource): The second image
+
+    Returns:
+        Dict[str, Any]: Dictionary containing all analysis results and statistics
+    """
+
+    # Per-stage seconds for each image, the comparison and the total
+    timings = {'image1': {}, 'image2': {}}
+
+    with metrics.track('face', timings):
+        # Verify that both image files exist
+        if image_io.is_path(img1_path) and not os.path.exists(img1_path):
+            raise FileNotFoundError(f"Image 1 not found: {img1_path}")
+        if image_io.is_path(img2_path) and not os.path.exists(img2_path):
+            raise FileNotFoundError(f"Image 2 not found: {img2_path}")
+
+        # Start timing
+        start_time = time.time()
+
+        # Initialize results dictionary
+        results = {
+            'verified': None,
+            'distance': None,
+            'threshold': THRESHOLD,
+            'model_name': 'FaceNet512',
+            'distance_metric': 'cosine',
+            'faces_detected_img1': 0,
+            'faces_detected_img2': 0,
+            'detector_img1': None,
+            'detector_img2': None,
+            'processing_time': 0,
+            'timings': timings,
+            'face1_cropped': None,
+            'face2_cropped': None
+        }
+
+        try:
+            # Step 1: Decode, detect, crop and embed each image in a single
+            # pass, both images at the same time
+            analysis1, analysis2 = _analyze_pair(img1_path, img2_path, timings)
+
+            results['faces_detected_img1'] = analysis1['faces_detected']
+            results['faces_detected_img2'] = analysis2['faces_detected']
+            results['detector_img1'] = analysis1['detector']
+            results['detector_img2'] = analysis2['detector']
+            results['face1_cropped'] = analysis1['cropped']
+            results['face2_cropped'] = analysis2['cropped']
+
+            # Step 2: Compare the embeddings with the custom threshold
+            with metrics.stage('face', 'compare', timings):
+                distance = _cosine_distance(analysis1['embedding'], analysis2['embedding'])
+            results['distance'] = distance
+            results['verified'] = distance < results['threshold']
+
+            # Calculate processing time
+            results['processing_time'] = time.time() - start_time
+
+            return results
+
+        except Exception as e:
+            # Calculate processing time even if error occurs
+            results['processing_time'] = time.time() - start_time
+            raise e
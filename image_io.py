@@ -0,0 +1,201 @@
+import os
+from typing import Union, BinaryIO, Optional, Tuple
+import cv2
+import numpy as np
+
+# Anything the recognition functions accept as an image: a file path, encoded
+# image bytes (bytes, bytearray or memoryview such as UploadedFile.getbuffer()),
+# a binary file-like object, or an already decoded BGR array.
+ImageSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO, np.ndarray]
+
+# Map file extensions to MIME types
+MIME_TYPE_MAP = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp',
+    '.tiff': 'image/tiff',
+    '.tif': 'image/tiff',
+    '.gif': 'image/gif'
+}
+
+# Reduced-size decode flags by scale factor. JPEG decoders apply the reduction
+# while decoding (DCT scaling), so the full-size image is never allocated.
+REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+# JPEG start-of-frame markers, which carry the image dimensions
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def is_path(source: ImageSource) -> bool:
+    """Return True if the source is a file path rather than in-memory data."""
+    return isinstance(source, (str, os.PathLike))
+
+
+def describe_source(source: ImageSource) -> str:
+    """Short description of an image source for error messages."""
+    if is_path(source):
+        return os.fspath(source)
+    if isinstance(source, np.ndarray):
+        return f"<array {source.shape}>"
+    name = getattr(source, 'name', None)
+    if isinstance(name, str):
+        return name
+    return f"<{type(source).__name__}>"
+
+
+def read_image_bytes(source: ImageSource) -> Union[bytes, memoryview]:
+    """
+    Get the encoded bytes of an image source without copying in-memory buffers.
+
+    Args:
+        source (ImageSource): Path, bytes-like object or binary file-like object
+
+    Returns:
+        Union[bytes, memoryview]: Encoded image bytes
+
+    Raises:
+        FileNotFoundError: If a path does not exist
+        ValueError: If the source is a decoded array or cannot be read
+    """
+    if isinstance(source, np.ndarray):
+        raise ValueError("A decoded image array has no encoded bytes")
+
+    if is_path(source):
+        path = os.fspath(source)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Image file not found at: {path}")
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except IOError as e:
+            raise ValueError(f"Could not read image file {path}: {e}")
+
+    if isinstance(source, (bytes, memoryview)):
+        return source
+    if isinstance(source, bytearray):
+        return memoryview(source)
+
+    # In-memory file objects (io.BytesIO, Streamlit's UploadedFile) expose their
+    # buffer directly; anything else is read from the start
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer()
+    if hasattr(source, 'read'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return source.read()
+
+    raise ValueError(f"Unsupported image source type: {type(source).__name__}")
+
+
+def jpeg_size(data: Union[bytes, memoryview]) -> Optional[Tuple[int, int]]:
+    """
+    Read the dimensions of a JPEG from its frame header without decoding it.
+
+    Returns:
+        Optional[Tuple[int, int]]: (width, height) as stored, before any EXIF
+            rotation, or None if the data is not a JPEG or has no frame header
+    """
+    data = memoryview(data).cast('B')
+    if bytes(data[:3]) != b'\xff\xd8\xff':
+        return None
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # markers without a length
+            i += 2
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 > len(data):
+                return None
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + length
+    return None
+
+
+def decode_image(data: Union[bytes, memoryview], source: Optional[ImageSource] = None,
+                 min_side: int = 0) -> np.ndarray:
+    """
+    Decode encoded image bytes into a BGR array.
+
+    With min_side set, a JPEG at least twice that size on its long side is
+    decoded at 1/2, 1/4 or 1/8 scale: the smallest that keeps the long side at
+    min_side or more. Other formats are always decoded at full size.
+
+    Args:
+        data (Union[bytes, memoryview]): Encoded image bytes
+        source (ImageSource): Where the bytes came from, for error messages
+        min_side (int): Smallest long side the caller needs; 0 decodes at full
+            resolution
+
+    Returns:
+        np.ndarray: Decoded BGR image
+
+    Raises:
+        ValueError: If the bytes cannot be decoded as an image
+    """
+    flags = cv2.IMREAD_COLOR
+    size = jpeg_size(data) if min_side > 0 else None
+    if size is not None:
+        for factor in (8, 4, 2):
+            if max(size) // factor >= min_side:
+                flags = REDUCED_DECODE_FLAGS[factor]
+                break
+
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+    if img is None:
+        raise ValueError(f"Could not decode image: {describe_source(source)}")
+    return img
+
+
+def sniff_mime_type(data: Union[bytes, memoryview]) -> Optional[str]:
+    """
+    Detect an image MIME type from its leading bytes.
+
+    Returns:
+        Optional[str]: The MIME type, or None if the format is not recognized
+    """
+    head = bytes(data[:12])
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith(b'GIF87a') or head.startswith(b'GIF89a'):
+        return 'image/gif'
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.startswith(b'BM'):
+        return 'image/bmp'
+    if head.startswith(b'II*\x00') or head.startswith(b'MM\x00*'):
+        return 'image/tiff'
+    return None
+
+
+def encode_image(img: np.ndarray, extension: str = '.jpg') -> bytes:
+    """
+    Encode a BGR array into image bytes.
+
+    Args:
+        img (np.ndarray): BGR image
+        extension (str): Target format, e.g. '.jpg' or '.png'
+
+    Returns:
+        bytes: Encoded image
+    """
+    ok, buffer = cv2.imencode(extension, img)
+    if not ok:
+        raise ValueError(f"Could not encode image as {extension}")
+    return buffer.tobytes()
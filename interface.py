@@ -1,11 +1,20 @@
 import streamlit as st
 import os
 import json
+import hashlib
+import threading
 from PIL import Image
-import io
 import numpy as np
-from nid_recog import get_nid_info
-from face_recog import detect_face
+import model_registry
+import embedding_cache
+import metrics
+
+# The face pipeline (DeepFace/TensorFlow) and the Gemini SDK are imported by
+# the tab that first needs them, not at startup. APP_FACE_PRELOAD picks when
+# the face models are loaded: "background" starts loading them once the page
+# has rendered, "eager" blocks the first render until they are ready, "lazy"
+# waits for the first face comparison.
+FACE_PRELOAD = os.getenv("APP_FACE_PRELOAD", "background")
 
 # Configure page
 st.set_page_config(
@@ -13,12 +22,83 @@ st.set_page_config(
     layout="wide"
 )
 
+def _preload_face_models():
+    from face_recog import MODEL_NAME, DETECTOR_BACKEND
+    return model_registry.preload(MODEL_NAME, DETECTOR_BACKEND)
+
+# Load face models once per process and warm them up
+@st.cache_resource(show_spinner="Loading face recognition models")
+def load_face_models():
+    return _preload_face_models()
+
+@st.cache_resource(show_spinner=False)
+def start_face_model_preload():
+    def run():
+        try:
+            _preload_face_models()
+        except Exception:
+            # Readiness state (including the error) is shown in the sidebar
+            pass
+    thread = threading.Thread(target=run, name="face-model-preload", daemon=True)
+    thread.start()
+    return thread
+
+if FACE_PRELOAD == "eager":
+    try:
+        load_face_models()
+    except Exception:
+        # Readiness state (including the error) is shown in the sidebar
+        pass
+
+# Results and decoded previews are kept in the session, keyed by a hash of the
+# uploaded bytes. Streamlit reruns this script on every interaction (including
+# the download buttons), and the reruns redraw them from here instead of
+# decoding the uploads or processing them again.
+SESSION_CACHE_SIZE = int(os.getenv("APP_SESSION_CACHE_SIZE", "8"))
+PREVIEW_MAX_SIDE = 1280  # Uploads are shown downscaled to this size
+
+def session_cache(name):
+    return st.session_state.setdefault(name, {})
+
+def upload_hash(uploaded_file):
+    """Content hash of an upload, computed once per uploaded file."""
+    hashes = session_cache('upload_hashes')
+    file_id = getattr(uploaded_file, 'file_id', None)
+    digest = hashes.get(file_id) if file_id else None
+    if digest is None:
+        digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        if file_id:
+            remember('upload_hashes', file_id, digest)
+    return digest
+
+def remember(name, key, value):
+    """Store a value in a session cache, dropping the oldest entries beyond SESSION_CACHE_SIZE."""
+    cache = session_cache(name)
+    cache.pop(key, None)
+    cache[key] = value
+    while len(cache) > SESSION_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    return value
+
+def load_preview(uploaded_file):
+    """Decode and downscale an upload for display, once per session."""
+    key = upload_hash(uploaded_file)
+    preview = session_cache('previews').get(key)
+    if preview is None:
+        preview = Image.open(uploaded_file)
+        preview.thumbnail((PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE))
+        remember('previews', key, preview)
+    return preview
+
+def show_cache_hit():
+    st.caption("⚡ Saved result for these uploads, shown without processing them again")
+
 # Main title
 st.title("NID & Face Recognition")
 st.markdown("---")
 
 # Create tabs
-tab1, tab2 = st.tabs(["NID Information", "Face Recognition"])
+tab1, tab2, tab3 = st.tabs(["NID Information", "Face Recognition", "Customer Onboarding"])
 
 # NID Information Tab
 with tab1:
@@ -34,64 +114,25 @@ with tab1:
     if uploaded_file is not None:
         # Display the uploaded image
         st.subheader("Uploaded Image")
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded NID Card", use_container_width=True)
+        st.image(load_preview(uploaded_file), caption="Uploaded NID Card", use_container_width=True)
+        
+        nid_key = upload_hash(uploaded_file)
+        nid_cached = nid_key in session_cache('nid_results')
         
         # Process button
-        if st.button("Extract NID Information", type="primary"):
+        if st.button("Extract NID Information", type="primary") and not nid_cached:
             with st.spinner("Processing NID"):
                 try:
-                    # Save uploaded file temporarily
-                    temp_path = f"temp_{uploaded_file.name}"
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    # Process the image
-                    nid_info = get_nid_info(temp_path)
-                    
-                    # Clean up temporary file
-                    os.remove(temp_path)
-                    
-                    # Display results
+                    from nid_recog import get_nid_info
+                    import result_store
+                    
+                    # Process the uploaded bytes directly, without a temporary file
+                    nid_timings = {}
+                    nid_info = get_nid_info(uploaded_file.getbuffer(), timings=nid_timings)
+                    result_store.record('nid', nid_info, channel='ui')
+                    remember('nid_results', nid_key, {'nid_info': nid_info, 'timings': nid_timings})
                     st.success("NID Information extracted successfully!")
                     
-                    # Create a nice display of the results
-                    st.subheader("Extracted Information")
-                    
-                    # Create columns for better layout
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("**Personal Information:**")
-                        if nid_info.get('Name'):
-                            st.write(f"**Name:** {nid_info['Name']}")
-                        if nid_info.get('Name_Bangla'):
-                            st.write(f"**Name (Bangla):** {nid_info['Name_Bangla']}")
-                        if nid_info.get('Date_of_Birth'):
-                            st.write(f"**Date of Birth:** {nid_info['Date_of_Birth']}")
-                        if nid_info.get('NID_Number'):
-                            st.write(f"**NID Number:** {nid_info['NID_Number']}")
-                    
-                    with col2:
-                        st.markdown("**Family Information:**")
-                        if nid_info.get("Father's Name"):
-                            st.write(f"**Father's Name:** {nid_info['Father\'s Name']}")
-                        if nid_info.get("Mother's Name"):
-                            st.write(f"**Mother's Name:** {nid_info['Mother\'s Name']}")
-                    
-                    # Show raw JSON data in expander
-                    with st.expander("Raw JSON Data"):
-                        st.json(nid_info)
-                    
-                    # Download button for results
-                    json_str = json.dumps(nid_info, indent=2, ensure_ascii=False)
-                    st.download_button(
-                        label="Download Results as JSON",
-                        data=json_str,
-                        file_name=f"nid_info_{uploaded_file.name.split('.')[0]}.json",
-                        mime="application/json"
-                    )
-                    
                 except FileNotFoundError as e:
                     st.error(f"File not found: {e}")
                 except ValueError as e:
@@ -99,6 +140,62 @@ with tab1:
                 except Exception as e:
                     st.error(f"Error processing image: {e}")
                     st.info("Make sure your API key is properly configured in the .env file.")
+        
+        nid_result = session_cache('nid_results').get(nid_key)
+        if nid_result is not None:
+            nid_info = nid_result['nid_info']
+            nid_timings = nid_result['timings']
+            if nid_cached:
+                show_cache_hit()
+            
+            # Create a nice display of the results
+            st.subheader("Extracted Information")
+            
+            # Create columns for better layout
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("**Personal Information:**")
+                if nid_info.get('Name'):
+                    st.write(f"**Name:** {nid_info['Name']}")
+                if nid_info.get('Name_Bangla'):
+                    st.write(f"**Name (Bangla):** {nid_info['Name_Bangla']}")
+                if nid_info.get('Date_of_Birth'):
+                    st.write(f"**Date of Birth:** {nid_info['Date_of_Birth']}")
+                if nid_info.get('NID_Number'):
+                    st.write(f"**NID Number:** {nid_info['NID_Number']}")
+            
+            with col2:
+                st.markdown("**Family Information:**")
+                fathers_name = nid_info.get("Father's Name")
+                mothers_name = nid_info.get("Mother's Name")
+                if fathers_name:
+                    st.write(f"**Father's Name:** {fathers_name}")
+                if mothers_name:
+                    st.write(f"**Mother's Name:** {mothers_name}")
+            
+            # Say which fields were read locally from the card's barcode
+            barcode_fields = [field for field, source in nid_info.get('_sources', {}).items() if source == 'barcode']
+            if barcode_fields:
+                st.caption(f"Read from the card barcode: {', '.join(barcode_fields)}")
+            
+            # Show raw JSON data in expander
+            with st.expander("Raw JSON Data"):
+                st.json(nid_info)
+            
+            # Show where the time went
+            with st.expander(f"Processing Time ({nid_timings['total']:.2f} seconds)"):
+                st.table({stage: [f"{seconds * 1000:.0f} ms"] for stage, seconds in nid_timings.items()})
+            
+            # Download button for results; the click reruns the script, which
+            # redraws the saved result instead of extracting again
+            json_str = json.dumps(nid_info, indent=2, ensure_ascii=False)
+            st.download_button(
+                label="Download Results as JSON",
+                data=json_str,
+                file_name=f"nid_info_{uploaded_file.name.split('.')[0]}.json",
+                mime="application/json"
+            )
 
 # Face Recognition Tab
 with tab2:
@@ -129,121 +226,29 @@ with tab2:
         img_col1, img_col2 = st.columns(2)
         
         with img_col1:
-            image1 = Image.open(uploaded_file1)
+            image1 = load_preview(uploaded_file1)
             st.image(image1, caption="Image 1", use_container_width=True)
         
         with img_col2:
-            image2 = Image.open(uploaded_file2)
+            image2 = load_preview(uploaded_file2)
             st.image(image2, caption="Image 2", use_container_width=True)
         
+        face_key = (upload_hash(uploaded_file1), upload_hash(uploaded_file2))
+        face_cached = face_key in session_cache('face_results')
+        
         # Process button
-        if st.button("Compare Faces", type="primary"):
+        if st.button("Compare Faces", type="primary") and not face_cached:
             with st.spinner("Processing face comparison"):
                 try:
-                    # Save uploaded files temporarily
-                    temp_path1 = f"temp_face1_{uploaded_file1.name}"
-                    temp_path2 = f"temp_face2_{uploaded_file2.name}"
-                    
-                    with open(temp_path1, "wb") as f:
-                        f.write(uploaded_file1.getbuffer())
-                    with open(temp_path2, "wb") as f:
-                        f.write(uploaded_file2.getbuffer())
-                    
-                    # Process the images
-                    results = detect_face(temp_path1, temp_path2)
+                    from face_recog import detect_face
+                    import result_store
                     
-                    # Clean up temporary files
-                    os.remove(temp_path1)
-                    os.remove(temp_path2)
-                    
-                    # Display results
+                    # Process the uploaded bytes directly, without temporary files
+                    results = detect_face(uploaded_file1.getbuffer(), uploaded_file2.getbuffer())
+                    result_store.record('face', results, channel='ui')
+                    remember('face_results', face_key, results)
                     st.success("Face comparison completed!")
                     
-                    # Display images with cropped faces
-                    st.subheader("Face Analysis")
-                    
-                    # Create 2x2 grid for images
-                    img_row1_col1, img_row1_col2 = st.columns(2)
-                    img_row2_col1, img_row2_col2 = st.columns(2)
-                    
-                    with img_row1_col1:
-                        st.markdown("**Original Image 1**")
-                        st.image(image1, use_container_width=True)
-                    
-                    with img_row1_col2:
-                        st.markdown("**Original Image 2**")
-                        st.image(image2, use_container_width=True)
-                    
-                    with img_row2_col1:
-                        st.markdown("**Cropped Face 1**")
-                        if results['face1_cropped'] is not None:
-                            # Convert numpy array to PIL Image
-                            face1_pil = Image.fromarray(results['face1_cropped'])
-                            st.image(face1_pil, use_container_width=True)
-                        else:
-                            st.error("No face detected in Image 1")
-                    
-                    with img_row2_col2:
-                        st.markdown("**Cropped Face 2**")
-                        if results['face2_cropped'] is not None:
-                            # Convert numpy array to PIL Image
-                            face2_pil = Image.fromarray(results['face2_cropped'])
-                            st.image(face2_pil, use_container_width=True)
-                        else:
-                            st.error("No face detected in Image 2")
-                    
-                    # Display statistics
-                    st.subheader("Comparison Results")
-                    
-                    # Create columns for statistics
-                    stat_col1, stat_col2, stat_col3 = st.columns(3)
-                    
-                    with stat_col1:
-                        st.metric("Verification Result", 
-                                "Match" if results['verified'] else "No Match",
-                                delta="✓" if results['verified'] else "✗")
-                    
-                    with stat_col2:
-                        st.metric("Similarity Score", 
-                                f"{results['distance']:.4f}",
-                                delta="Lower is better")
-                    
-                    with stat_col3:
-                        st.metric("Threshold", 
-                                f"{results['threshold']:.4f}")
-                    
-                    # Display detailed statistics
-                    st.subheader("Detailed Statistics")
-                    
-                    detail_col1, detail_col2 = st.columns(2)
-                    
-                    with detail_col1:
-                        st.markdown("**Face Detection:**")
-                        st.write(f"**Image 1 faces detected:** {results['faces_detected_img1']}")
-                        st.write(f"**Image 2 faces detected:** {results['faces_detected_img2']}")
-                        st.write(f"**Model used:** {results['model_name']}")
-                    
-                    with detail_col2:
-                        st.markdown("**Processing Details:**")
-                        st.write(f"**Processing time:** {results['processing_time']:.2f} seconds")
-                        st.write(f"**Distance metric:** {results['distance_metric']}")
-                        st.write(f"**Verification threshold:** {results['threshold']}")
-                    
-                    # Show raw results in expander
-                    with st.expander("Raw Results Data"):
-                        # Remove numpy arrays from results for JSON serialization
-                        json_results = {k: v for k, v in results.items() if not isinstance(v, np.ndarray)}
-                        st.json(json_results)
-                    
-                    # Download button for results
-                    json_str = json.dumps(json_results, indent=2, ensure_ascii=False)
-                    st.download_button(
-                        label="Download Results as JSON",
-                        data=json_str,
-                        file_name=f"face_comparison_{uploaded_file1.name.split('.')[0]}_{uploaded_file2.name.split('.')[0]}.json",
-                        mime="application/json"
-                    )
-                    
                 except FileNotFoundError as e:
                     st.error(f"File not found: {e}")
                 except ValueError as e:
@@ -251,15 +256,258 @@ with tab2:
                 except Exception as e:
                     st.error(f"Error processing images: {e}")
                     st.info("Make sure both images contain clear, visible faces.")
+        
+        results = session_cache('face_results').get(face_key)
+        if results is not None:
+            if face_cached:
+                show_cache_hit()
+            
+            # Display images with cropped faces
+            st.subheader("Face Analysis")
+            
+            # Create 2x2 grid for images
+            img_row1_col1, img_row1_col2 = st.columns(2)
+            img_row2_col1, img_row2_col2 = st.columns(2)
+            
+            with img_row1_col1:
+                st.markdown("**Original Image 1**")
+                st.image(image1, use_container_width=True)
+            
+            with img_row1_col2:
+                st.markdown("**Original Image 2**")
+                st.image(image2, use_container_width=True)
+            
+            with img_row2_col1:
+                st.markdown("**Cropped Face 1**")
+                if results['face1_cropped'] is not None:
+                    # Convert numpy array to PIL Image
+                    face1_pil = Image.fromarray(results['face1_cropped'])
+                    st.image(face1_pil, use_container_width=True)
+                else:
+                    st.error("No face detected in Image 1")
+            
+            with img_row2_col2:
+                st.markdown("**Cropped Face 2**")
+                if results['face2_cropped'] is not None:
+                    # Convert numpy array to PIL Image
+                    face2_pil = Image.fromarray(results['face2_cropped'])
+                    st.image(face2_pil, use_container_width=True)
+                else:
+                    st.error("No face detected in Image 2")
+            
+            # Display statistics
+            st.subheader("Comparison Results")
+            
+            # Create columns for statistics
+            stat_col1, stat_col2, stat_col3 = st.columns(3)
+            
+            with stat_col1:
+                st.metric("Verification Result", 
+                        "Match" if results['verified'] else "No Match",
+                        delta="✓" if results['verified'] else "✗")
+            
+            with stat_col2:
+                st.metric("Similarity Score", 
+                        f"{results['distance']:.4f}",
+                        delta="Lower is better")
+            
+            with stat_col3:
+                st.metric("Threshold", 
+                        f"{results['threshold']:.4f}")
+            
+            # Display detailed statistics
+            st.subheader("Detailed Statistics")
+            
+            detail_col1, detail_col2 = st.columns(2)
+            
+            with detail_col1:
+                st.markdown("**Face Detection:**")
+                st.write(f"**Image 1 faces detected:** {results['faces_detected_img1']}")
+                st.write(f"**Image 2 faces detected:** {results['faces_detected_img2']}")
+                st.write(f"**Model used:** {results['model_name']}")
+                st.write(f"**Detectors:** {results['detector_img1']} / {results['detector_img2']}")
+            
+            with detail_col2:
+                st.markdown("**Processing Details:**")
+                st.write(f"**Processing time:** {results['processing_time']:.2f} seconds")
+                st.write(f"**Distance metric:** {results['distance_metric']}")
+                st.write(f"**Verification threshold:** {results['threshold']}")
+            
+            # Per-stage timings for each image
+            with st.expander("Stage Timings"):
+                timings = results['timings']
+                stages = list(dict.fromkeys([*timings['image1'], *timings['image2']]))
+                st.table({
+                    'Stage': stages,
+                    'Image 1 (ms)': [f"{timings['image1'].get(stage, 0) * 1000:.1f}" for stage in stages],
+                    'Image 2 (ms)': [f"{timings['image2'].get(stage, 0) * 1000:.1f}" for stage in stages]
+                })
+                st.caption(f"Compare {timings['compare'] * 1000:.2f} ms, total {timings['total']:.2f} s")
+            
+            # Show raw results in expander
+            with st.expander("Raw Results Data"):
+                # Remove numpy arrays from results for JSON serialization
+                json_results = {k: v for k, v in results.items() if not isinstance(v, np.ndarray)}
+                st.json(json_results)
+            
+            # Download button for results; the click reruns the script, which
+            # redraws the saved result instead of comparing again
+            json_str = json.dumps(json_results, indent=2, ensure_ascii=False)
+            st.download_button(
+                label="Download Results as JSON",
+                data=json_str,
+                file_name=f"face_comparison_{uploaded_file1.name.split('.')[0]}_{uploaded_file2.name.split('.')[0]}.json",
+                mime="application/json"
+            )
+
+# Customer Onboarding Tab
+with tab3:
+    st.header("Customer Onboarding")
+    st.caption("Extracts the NID fields and matches the card portrait against the selfie in one step.")
+    
+    kyc_col1, kyc_col2 = st.columns(2)
+    
+    with kyc_col1:
+        kyc_nid_file = st.file_uploader(
+            "Upload NID card...",
+            type=['jpg', 'jpeg', 'png', 'webp', 'bmp', 'tiff', 'tif', 'gif'],
+            key="kyc_nid"
+        )
+        if kyc_nid_file is not None:
+            st.image(load_preview(kyc_nid_file), caption="NID Card", use_container_width=True)
+    
+    with kyc_col2:
+        kyc_selfie_file = st.file_uploader(
+            "Upload selfie...",
+            type=['jpg', 'jpeg', 'png', 'webp', 'bmp', 'tiff', 'tif', 'gif'],
+            key="kyc_selfie"
+        )
+        if kyc_selfie_file is not None:
+            st.image(load_preview(kyc_selfie_file), caption="Selfie", use_container_width=True)
+    
+    if kyc_nid_file is not None and kyc_selfie_file is not None:
+        kyc_key = (upload_hash(kyc_nid_file), upload_hash(kyc_selfie_file))
+        kyc_cached = kyc_key in session_cache('kyc_results')
+        
+        if st.button("Verify Customer", type="primary") and not kyc_cached:
+            with st.spinner("Extracting NID information and matching faces"):
+                try:
+                    from kyc_pipeline import verify_customer
+                    import result_store
+                    
+                    kyc_result = verify_customer(kyc_nid_file.getbuffer(), kyc_selfie_file.getbuffer())
+                    result_store.record('kyc', kyc_result, channel='ui')
+                    remember('kyc_results', kyc_key, kyc_result)
+                    
+                except FileNotFoundError as e:
+                    st.error(f"File not found: {e}")
+                except ValueError as e:
+                    st.error(f"Invalid input: {e}")
+                except Exception as e:
+                    st.error(f"Error processing onboarding: {e}")
+        
+        kyc_result = session_cache('kyc_results').get(kyc_key)
+        if kyc_result is not None:
+            if kyc_cached:
+                show_cache_hit()
+            
+            if kyc_result['verified']:
+                st.success("Selfie matches the NID portrait")
+            elif kyc_result['face_match'] is not None:
+                st.error("Selfie does not match the NID portrait")
+            for branch, message in kyc_result['errors'].items():
+                st.error(f"{'NID extraction' if branch == 'nid' else 'Face matching'} failed: {message}")
+            
+            info_col, face_col = st.columns(2)
+            
+            with info_col:
+                st.subheader("NID Information")
+                if kyc_result['nid_info'] is not None:
+                    st.json(kyc_result['nid_info'])
+            
+            with face_col:
+                st.subheader("Face Match")
+                face_match = kyc_result['face_match']
+                if face_match is not None:
+                    crop_col1, crop_col2 = st.columns(2)
+                    with crop_col1:
+                        st.image(Image.fromarray(face_match['portrait_cropped']), caption="NID Portrait")
+                    with crop_col2:
+                        st.image(Image.fromarray(face_match['selfie_cropped']), caption="Selfie")
+                    st.metric("Similarity Score", f"{face_match['distance']:.4f}",
+                              delta=f"Threshold {face_match['threshold']:.2f}")
+            
+            kyc_timings = kyc_result['timings']
+            st.caption(f"Total {kyc_timings['total']:.2f}s "
+                       f"(NID extraction {kyc_timings['nid'].get('total', 0):.2f}s, "
+                       f"face matching {kyc_timings['face'].get('total', 0):.2f}s, run in parallel)")
 
-# Sidebar with API status only
+# Sidebar with API and model status
 with st.sidebar:
     st.header("API Status")
     try:
-        from nid_recog import get_api_key
-        api_key = get_api_key()
-        st.success("Gemini API Key: Configured")
-        st.caption(f"Using: {api_key[:10]}...{api_key[-4:]}")
+        # Keys, usage, latency and throttling from the key pool that serves
+        # the NID requests
+        from nid_recog import get_key_pool
+        key_stats = get_key_pool().get_stats()
+        ready = sum(1 for stats in key_stats.values() if stats['benched_for'] == 0 and stats['tokens'] >= 1)
+        st.success(f"Gemini API Keys: {len(key_stats)} configured")
+        st.caption(f"{ready} of {len(key_stats)} ready for a request now")
+        with st.expander("Key Pool Statistics"):
+            st.table(key_stats)
     except Exception as e:
-        st.error("Gemini API Key: Not configured")
-        st.caption("Please set up your API key in the .env file")
+        # Missing keys and invalid pool settings both end up here
+        st.error("Gemini API Keys: Not available")
+        st.caption(f"{e} (check the Gemini settings in your .env file)")
+
+    st.header("Metrics")
+    metrics_snapshot = metrics.get_registry().to_dict()
+    request_counts = metrics_snapshot['counters']
+    latencies = metrics_snapshot['histograms']
+    for operation, label in (('face', "Face comparisons"), ('nid', "NID extractions"), ('kyc', "Onboardings")):
+        counts = {series['labels']['status']: series['value'] for series in request_counts.get(f"{operation}_requests_total", [])}
+        if not counts:
+            st.caption(f"{label}: no requests yet")
+            continue
+        latency = latencies[f"{operation}_request_seconds"][0]
+        st.caption(f"{label}: {counts.get('ok', 0):.0f} ok, {counts.get('error', 0):.0f} failed, "
+                   f"p50 {latency['p50']:.2f}s, p90 {latency['p90']:.2f}s")
+        errors = request_counts.get(f"{operation}_errors_total", [])
+        if errors:
+            st.caption("Errors: " + ", ".join(f"{series['labels']['error_type']} {series['value']:.0f}" for series in errors))
+    with st.expander("Stage Latency"):
+        stage_rows = [
+            {'Stage': f"{name.split('_')[0]}.{series['labels']['stage']}", 'Count': series['count'],
+             'Mean (ms)': f"{series['mean'] * 1000:.1f}", 'p90 (ms)': f"{series['p90'] * 1000:.1f}"}
+            for name in ('face_stage_seconds', 'nid_stage_seconds')
+            for series in latencies.get(name, [])
+        ]
+        if stage_rows:
+            st.table(stage_rows)
+        else:
+            st.caption("No requests yet")
+    st.download_button("Export Metrics (Prometheus)", data=metrics.export_prometheus(),
+                       file_name="metrics.prom", mime="text/plain")
+    st.download_button("Export Metrics (JSON)", data=metrics.export_json(),
+                       file_name="metrics.json", mime="application/json")
+
+    st.header("Model Status")
+    model_status = model_registry.get_status()
+    if model_status['ready']:
+        st.success(f"Face Models: Ready ({model_status['model_name']}, {model_status['detector_backend']})")
+        st.caption(f"Loaded in {model_status['load_time']:.2f}s, warm-up {model_status['warmup_time']:.2f}s")
+    elif model_status['error']:
+        st.error("Face Models: Not ready")
+        st.caption(model_status['error'])
+    elif model_status['loading'] or FACE_PRELOAD == "background":
+        st.info("Face Models: Loading in the background")
+    else:
+        st.info("Face Models: Loaded on first use")
+
+    cache_stats = embedding_cache.get_cache().get_stats()
+    st.caption(f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+               f"({cache_stats['hit_rate']:.0%} hit rate)")
+
+# Start loading the face models now that the page has been sent
+if FACE_PRELOAD == "background":
+    start_face_model_preload()
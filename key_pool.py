@@ -0,0 +1,291 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+# How long call() and call_async() wait for a key unless told otherwise
+DEFAULT_ACQUIRE_TIMEOUT = 120.0
+
+
+class KeyPoolTimeout(Exception):
+    """Raised when no API key becomes available within the requested timeout."""
+
+
+def mask_key(key: str) -> str:
+    """Shorten an API key for display, e.g. 'AIzaSyB1...x9Qz'."""
+    return f"{key[:8]}...{key[-4:]}"
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Return True for rate-limit / quota errors (HTTP 429, ResourceExhausted)."""
+    if getattr(error, 'code', None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return 'resourceexhausted' in text or 'quota' in text or 'rate limit' in text
+
+
+def is_key_error(error: Exception) -> bool:
+    """Return True for errors caused by the key itself (HTTP 401/403)."""
+    return getattr(error, 'code', None) in (401, 403)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Return True for errors worth retrying on another key."""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and code >= 500:
+        return True
+    return (is_quota_error(error) or is_key_error(error)
+            or isinstance(error, (ConnectionError, TimeoutError)))
+
+
+class _KeyState:
+    """Token bucket, cool-down and statistics for a single key."""
+
+    def __init__(self, key: str, requests_per_minute: float):
+        self.key = key
+        # A budget below one request a minute (e.g. a share split across
+        # processes) still needs room for one token; only the refill slows down
+        self.capacity = max(1.0, float(requests_per_minute))
+        self.refill_rate = requests_per_minute / 60.0  # tokens per second
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.benched_until = 0.0
+        self.stats = {
+            'requests': 0,
+            'successes': 0,
+            'failures': 0,
+            'throttled': 0,
+            'total_latency': 0.0
+        }
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def wait_time(self, now: float) -> float:
+        # Seconds until this key can serve a request
+        if self.benched_until > now:
+            return self.benched_until - now
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.refill_rate
+
+
+class KeyPool:
+    """
+    Pool of API keys handed out round-robin under per-key rate limits.
+
+    Each key has a token bucket holding at most requests_per_minute tokens (and
+    at least one), refilled at requests_per_minute per minute; a request takes
+    one token. Keys that hit a quota or authentication error are
+    benched for cooldown_seconds and skipped until the cool-down ends.
+    """
+
+    def __init__(self, keys: List[str], requests_per_minute: float = 10,
+                 cooldown_seconds: float = 60.0):
+        """
+        Args:
+            keys (List[str]): API keys
+            requests_per_minute (float): Request budget per key
+            cooldown_seconds (float): How long a throttled key is benched
+
+        Raises:
+            ValueError: If no keys are given or requests_per_minute is not positive
+        """
+        if not keys:
+            raise ValueError("KeyPool needs at least one API key")
+        if not requests_per_minute > 0:
+            raise ValueError(f"requests_per_minute must be positive, got {requests_per_minute}")
+        self.cooldown_seconds = cooldown_seconds
+        self._states = [_KeyState(key, requests_per_minute) for key in keys]
+        self._by_key = {state.key: state for state in self._states}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, now: float):
+        # Returns (key, 0) if a key was taken, else (None, seconds to wait).
+        # Caller holds the lock.
+        wait = None
+        for offset in range(len(self._states)):
+            index = (self._next + offset) % len(self._states)
+            state = self._states[index]
+            state.refill(now)
+            state_wait = state.wait_time(now)
+            if state_wait == 0.0:
+                state.tokens -= 1.0
+                state.stats['requests'] += 1
+                self._next = index + 1
+                return state.key, 0.0
+            wait = state_wait if wait is None else min(wait, state_wait)
+        return None, wait
+
+    def acquire(self, timeout: Optional[float] = None) -> str:
+        """
+        Take the next available key, blocking until one has budget.
+
+        Args:
+            timeout (float): Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            str: An API key
+
+        Raises:
+            KeyPoolTimeout: If no key becomes available in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                key, wait = self._try_acquire(now)
+            if key is not None:
+                return key
+            if deadline is not None:
+                if now + wait > deadline:
+                    raise KeyPoolTimeout(f"No API key available within {timeout:.1f}s (all keys throttled or benched)")
+            time.sleep(wait)
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> str:
+        """
+        Async version of acquire(): waits without blocking the event loop.
+
+        Args:
+            timeout (float): Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            str: An API key
+
+        Raises:
+            KeyPoolTimeout: If no key becomes available in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                key, wait = self._try_acquire(now)
+            if key is not None:
+                return key
+            if deadline is not None:
+                if now + wait > deadline:
+                    raise KeyPoolTimeout(f"No API key available within {timeout:.1f}s (all keys throttled or benched)")
+            await asyncio.sleep(wait)
+
+    def report(self, key: str, latency: float, error: Optional[Exception] = None) -> None:
+        """
+        Record the outcome of a request made with a key.
+
+        Quota and authentication errors bench the key for the cool-down period.
+
+        Args:
+            key (str): The key that was used
+            latency (float): Request duration in seconds
+            error (Exception): The error raised, or None on success
+        """
+        with self._lock:
+            state = self._by_key[key]
+            state.stats['total_latency'] += latency
+            if error is None:
+                state.stats['successes'] += 1
+                return
+            state.stats['failures'] += 1
+            if is_quota_error(error):
+                state.stats['throttled'] += 1
+            if is_quota_error(error) or is_key_error(error):
+                state.benched_until = time.monotonic() + self.cooldown_seconds
+                state.tokens = 0.0
+
+    def call(self, fn: Callable[[str], Any], max_attempts: int = 4, base_delay: float = 0.5,
+             max_delay: float = 20.0, timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT) -> Any:
+        """
+        Call fn(key) with a pooled key, retrying retryable errors on another key.
+
+        Retries back off exponentially with full jitter.
+
+        Args:
+            fn (Callable[[str], Any]): Function taking an API key
+            max_attempts (int): Total attempts before giving up
+            base_delay (float): Backoff before the second attempt, in seconds
+            max_delay (float): Upper bound on a single backoff, in seconds
+            timeout (float): Maximum seconds to wait for a key on each attempt,
+                or None to wait indefinitely
+
+        Returns:
+            Any: Whatever fn returns
+
+        Raises:
+            KeyPoolTimeout: If no key becomes available in time
+            Exception: The last error if every attempt fails, or the first
+                non-retryable error
+        """
+        for attempt in range(max_attempts):
+            key = self.acquire(timeout)
+            start_time = time.monotonic()
+            try:
+                result = fn(key)
+            except Exception as e:
+                self.report(key, time.monotonic() - start_time, e)
+                if not is_retryable_error(e) or attempt + 1 == max_attempts:
+                    raise e
+                time.sleep(self.backoff(attempt, base_delay, max_delay))
+                continue
+            self.report(key, time.monotonic() - start_time)
+            return result
+
+    async def call_async(self, fn: Callable[[str], Awaitable[Any]], max_attempts: int = 4,
+                         base_delay: float = 0.5, max_delay: float = 20.0,
+                         timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT) -> Any:
+        """
+        Async version of call(): awaits fn(key) with the same retry policy.
+
+        Args:
+            fn (Callable[[str], Awaitable[Any]]): Coroutine function taking an API key
+            max_attempts (int): Total attempts before giving up
+            base_delay (float): Backoff before the second attempt, in seconds
+            max_delay (float): Upper bound on a single backoff, in seconds
+            timeout (float): Maximum seconds to wait for a key on each attempt
+
+        Returns:
+            Any: Whatever fn's coroutine returns
+        """
+        for attempt in range(max_attempts):
+            key = await self.acquire_async(timeout)
+            start_time = time.monotonic()
+            try:
+                result = await fn(key)
+            except Exception as e:
+                self.report(key, time.monotonic() - start_time, e)
+                if not is_retryable_error(e) or attempt + 1 == max_attempts:
+                    raise e
+                await asyncio.sleep(self.backoff(attempt, base_delay, max_delay))
+                continue
+            self.report(key, time.monotonic() - start_time)
+            return result
+
+    @staticmethod
+    def backoff(attempt: int, base_delay: float, max_delay: float) -> float:
+        """Exponential backoff with full jitter for the given attempt number."""
+        return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return per-key statistics, keyed by masked key.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 'requests', 'successes', 'failures',
+            'throttled', 'avg_latency', 'tokens' and 'benched_for' (seconds
+            left in the cool-down) for each key
+        """
+        now = time.monotonic()
+        stats = {}
+        with self._lock:
+            for state in self._states:
+                state.refill(now)
+                completed = state.stats['successes'] + state.stats['failures']
+                key_stats = dict(state.stats)
+                key_stats['avg_latency'] = state.stats['total_latency'] / completed if completed else 0.0
+                key_stats['tokens'] = state.tokens
+                key_stats['benched_for'] = max(0.0, state.benched_until - now)
+                del key_stats['total_latency']
+                stats[mask_key(state.key)] = key_stats
+        return stats
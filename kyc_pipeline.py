@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Single-call customer onboarding: NID field extraction plus selfie verification.
+
+Usage:
+    python kyc_pipeline.py path/to/nid_card.jpg path/to/selfie.jpg
+
+The NID image is read once and handed to two branches that run concurrently:
+Gemini extracts the card fields while the card portrait (the largest face on
+the card) is detected, embedded and compared with the selfie. The Gemini
+branch is network-bound and the face branch CPU-bound, so end-to-end latency
+approaches the slower branch rather than their sum.
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+import image_io
+import metrics
+from image_io import ImageSource
+from face_recog import detect_face
+from nid_recog import get_nid_info
+
+# Threads shared by all onboarding requests; each request uses two
+KYC_WORKERS = int(os.getenv("KYC_WORKERS", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=KYC_WORKERS, thread_name_prefix="kyc")
+        return _executor
+
+
+def _describe_error(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def verify_customer(nid_image: ImageSource, selfie: ImageSource, use_cache: bool = True,
+                    preprocess: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Extract NID fields and verify the card portrait against a selfie in one call.
+
+    Either image may be a file path, encoded image bytes, a binary file-like
+    object or a decoded BGR array. A failure in one branch does not discard the
+    other: its error is reported under 'errors' and its result is None.
+
+    Args:
+        nid_image (ImageSource): Photo or scan of the NID card
+        selfie (ImageSource): Photo of the customer
+        use_cache (bool): Use the NID result cache (see get_nid_info)
+        preprocess (bool): Shrink the NID image before upload (see get_nid_info)
+
+    Returns:
+        Dict[str, Any]: 'nid_info' (extracted fields), 'face_match' (verified,
+            distance, threshold, faces detected and the cropped portrait and
+            selfie faces), 'verified' (True only if the faces match), 'errors'
+            (branch name to message) and 'timings' ('nid' and 'face' stage
+            timings, 'total')
+
+    Raises:
+        FileNotFoundError: If an image path does not exist
+        ValueError: If the NID image cannot be read
+    """
+    timings = {'nid': {}, 'face': {}}
+    with metrics.track('kyc', timings):
+        # Read the card once; both branches work from the same bytes (or array)
+        if isinstance(nid_image, np.ndarray):
+            nid_data = nid_image
+        else:
+            nid_data = image_io.read_image_bytes(nid_image)
+        if image_io.is_path(selfie) and not os.path.exists(selfie):
+            raise FileNotFoundError(f"Selfie not found: {selfie}")
+
+        # Run field extraction and portrait matching side by side
+        executor = _get_executor()
+        nid_future = executor.submit(get_nid_info, nid_data, use_cache=use_cache, preprocess=preprocess,
+                                     timings=timings['nid'])
+        face_future = executor.submit(detect_face, nid_data, selfie)
+
+        result = {
+            'nid_info': None,
+            'face_match': None,
+            'verified': False,
+            'errors': {},
+            'timings': timings
+        }
+
+        try:
+            result['nid_info'] = nid_future.result()
+        except Exception as e:
+            result['errors']['nid'] = _describe_error(e)
+
+        try:
+            face_results = face_future.result()
+            timings['face'] = face_results['timings']
+            result['face_match'] = {
+                'verified': face_results['verified'],
+                'distance': face_results['distance'],
+                'threshold': face_results['threshold'],
+                'model_name': face_results['model_name'],
+                'faces_detected_nid': face_results['faces_detected_img1'],
+                'faces_detected_selfie': face_results['faces_detected_img2'],
+                'portrait_cropped': face_results['face1_cropped'],
+                'selfie_cropped': face_results['face2_cropped']
+            }
+            result['verified'] = bool(face_results['verified'])
+        except Exception as e:
+            result['errors']['face'] = _describe_error(e)
+
+        for branch in result['errors']:
+            metrics.inc('kyc_branch_errors_total', branch=branch)
+        return result
+
+
+def main():
+    """Run the onboarding pipeline on two images and print the result as JSON."""
+    parser = argparse.ArgumentParser(description="Extract NID fields and verify the card portrait against a selfie.")
+    parser.add_argument("nid_image", help="NID card image")
+    parser.add_argument("selfie", help="Selfie of the customer")
+    parser.add_argument("--no-cache", action="store_true", help="Always call Gemini, ignoring cached results")
+    args = parser.parse_args()
+
+    result = verify_customer(args.nid_image, args.selfie, use_cache=not args.no_cache)
+
+    # Drop the cropped faces, keep everything JSON-serializable
+    if result['face_match'] is not None:
+        result['face_match'] = {k: v for k, v in result['face_match'].items() if not isinstance(v, np.ndarray)}
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds, from cache hits to slow API calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    """Cumulative-bucket histogram of one labelled series."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # per bucket, not cumulative
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating within its bucket."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (bound - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+        # Beyond the last bucket; the last bound is the best estimate available
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.count
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': buckets
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of counters and histograms.
+
+    Series are created on first use and identified by a metric name plus a set of
+    labels, e.g. inc('face_requests_total', status='ok'). The registry can be
+    exported in the Prometheus text exposition format or as JSON.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets (Tuple[float, ...]): Histogram bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._histogram_buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Attach a HELP line to a metric for the Prometheus export."""
+        with self._lock:
+            self._help[name] = help_text
+
+    def set_buckets(self, name: str, buckets: Tuple[float, ...]) -> None:
+        """Use custom bucket bounds for a histogram that is not measured in seconds."""
+        with self._lock:
+            self._histogram_buckets[name] = tuple(buckets)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one observation (usually a duration in seconds) in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._histogram_buckets.get(name, self.buckets))
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        """Drop every recorded series."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Snapshot the registry.
+
+        Returns:
+            Dict[str, Any]: {'counters': {name: [{'labels', 'value'}]},
+                'histograms': {name: [{'labels', 'count', 'sum', 'mean', 'p50',
+                'p90', 'p99', 'buckets'}]}}
+        """
+        with self._lock:
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+            histograms = {
+                name: [{'labels': dict(key), **histogram.snapshot()} for key, histogram in sorted(series.items())]
+                for name, series in sorted(self._histograms.items())
+            }
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Export the registry as JSON."""
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Export the registry in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @contextmanager
+    def stage(self, operation: str, name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """
+        Time one stage of an operation.
+
+        The duration is observed in '<operation>_stage_seconds{stage=name}' and,
+        if a timings dict is given, added to timings[name].
+
+        Args:
+            operation (str): Operation the stage belongs to, e.g. 'face' or 'nid'
+            name (str): Stage name, e.g. 'decode' or 'gemini'
+            timings (Dict[str, float]): Optional per-request timings to fill in
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + elapsed
+            self.observe(f"{operation}_stage_seconds", elapsed, stage=name)
+
+    @contextmanager
+    def track(self, operation: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """
+        Time a whole request and count its outcome.
+
+        Updates '<operation>_requests_total{status}', '<operation>_request_seconds'
+        and, on failure, '<operation>_errors_total{error_type}'. Errors raised
+        with 'raise ... from cause' are counted under the cause's type. If a
+        timings dict is given its 'total' is set.
+
+        Args:
+            operation (str): Operation name, e.g. 'face' or 'nid'
+            timings (Dict[str, float]): Optional per-request timings to fill in
+        """
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except BaseException as e:
+            status = 'error'
+            self.inc(f"{operation}_errors_total", error_type=type(e.__cause__ or e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if timings is not None:
+                timings['total'] = elapsed
+            self.inc(f"{operation}_requests_total", status=status)
+            self.observe(f"{operation}_request_seconds", elapsed)
+
+
+# Process-wide registry used by face_recog and nid_recog
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("face_requests_total", "Face comparisons by outcome.")
+REGISTRY.describe("face_request_seconds", "End-to-end face comparison latency.")
+REGISTRY.describe("face_stage_seconds", "Face pipeline stage latency, per image.")
+REGISTRY.describe("face_errors_total", "Failed face comparisons by exception type.")
+REGISTRY.describe("face_branch_seconds", "Wall-clock time of one image's analysis within a comparison.")
+REGISTRY.describe("face_detector_total", "Detector cascade tier outcomes by backend.")
+REGISTRY.describe("face_detector_seconds", "Detection latency by backend.")
+REGISTRY.describe("face_batch_size", "Faces per batched embedding call.")
+REGISTRY.describe("face_queue_wait_seconds", "Time a face waited for its embedding batch to start.")
+REGISTRY.describe("face_batch_seconds", "Batched embedding inference latency.")
+REGISTRY.describe("nid_requests_total", "NID extractions by outcome.")
+REGISTRY.describe("nid_request_seconds", "End-to-end NID extraction latency.")
+REGISTRY.describe("nid_stage_seconds", "NID extraction stage latency.")
+REGISTRY.describe("nid_errors_total", "Failed NID extractions by exception type.")
+REGISTRY.describe("nid_cache_total", "NID result cache lookups by result (hit, miss, error).")
+REGISTRY.describe("nid_barcode_total", "NID barcode reads by result.")
+REGISTRY.describe("kyc_requests_total", "Onboarding requests by outcome.")
+REGISTRY.describe("kyc_request_seconds", "End-to-end onboarding latency.")
+REGISTRY.describe("kyc_errors_total", "Failed onboarding requests by exception type.")
+REGISTRY.describe("kyc_branch_errors_total", "Onboarding branches (nid, face) that failed.")
+
+# Shortcuts for the process-wide registry
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+stage = REGISTRY.stage
+track = REGISTRY.track
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return REGISTRY
+
+
+def export_prometheus() -> str:
+    """Export the process-wide registry in the Prometheus text format."""
+    return REGISTRY.to_prometheus()
+
+
+def export_json() -> str:
+    """Export the process-wide registry as JSON."""
+    return REGISTRY.to_json()
@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+import metrics
+
+# Bucket bounds for the batch size histogram
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    """
+    Collects single inputs from concurrent callers into batched model calls.
+
+    A background thread takes the first waiting input, then gathers whatever
+    else arrives until the batch holds max_batch_size inputs or max_wait_ms has
+    passed since that first input was submitted. The batch is run through
+    predict_fn in one call and each caller receives its own row of the output.
+    Under load batches fill up while the previous one runs; a lone request only
+    pays the maximum wait.
+
+    Batch sizes, queue waits and batch inference time are recorded in the
+    metrics registry as '<name>_batch_size', '<name>_queue_wait_seconds' and
+    '<name>_batch_seconds'.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray], max_batch_size: int = 16,
+                 max_wait_ms: float = 2.0, name: str = 'batch'):
+        """
+        Args:
+            predict_fn (Callable[[np.ndarray], np.ndarray]): Maps a stacked batch
+                of inputs to one output row per input
+            max_batch_size (int): Most inputs per predict_fn call
+            max_wait_ms (float): Longest time the first input of a batch waits
+                for others to join it
+            name (str): Prefix for the metric names
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        metrics.REGISTRY.set_buckets(f"{name}_batch_size", BATCH_SIZE_BUCKETS)
+        self._thread = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: np.ndarray) -> Future:
+        """Queue one input; the returned future resolves to its output row."""
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def predict(self, item: np.ndarray) -> np.ndarray:
+        """Run one input through the model as part of a batch and wait for its output."""
+        return self.submit(item).result()
+
+    def _collect(self) -> list:
+        # Block for the first input, then fill the batch until it is full or
+        # the first input has waited max_wait
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            start_time = time.perf_counter()
+            for _, _, submitted in batch:
+                metrics.observe(f"{self.name}_queue_wait_seconds", start_time - submitted)
+            metrics.observe(f"{self.name}_batch_size", len(batch))
+
+            try:
+                outputs = self.predict_fn(np.stack([item for item, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            metrics.observe(f"{self.name}_batch_seconds", time.perf_counter() - start_time)
+
+            for row, (_, future, _) in zip(outputs, batch):
+                future.set_result(row)
@@ -0,0 +1,148 @@
+import threading
+import time
+from typing import Dict, Any
+import numpy as np
+
+# Defaults match the settings used by face_recog
+DEFAULT_MODEL_NAME = "Facenet512"
+DEFAULT_DETECTOR_BACKEND = "opencv"
+
+# Process-wide state. DeepFace keeps its own per-process caches of built
+# models and detectors; the registry makes sure they are filled once, up front,
+# and records whether the process is ready to serve requests. DeepFace (and
+# with it TensorFlow) is only imported once a model is actually built, so
+# checking readiness stays cheap. Models are built under _build_lock, which
+# get_status() never takes, so the status can be read while a model loads.
+_build_lock = threading.Lock()
+_status_lock = threading.Lock()
+_models = {}
+_detectors = {}
+_status = {
+    'ready': False,
+    'loading': False,
+    'model_name': None,
+    'detector_backend': None,
+    'load_time': None,
+    'warmup_time': None,
+    'error': None
+}
+
+
+def get_model(model_name: str = DEFAULT_MODEL_NAME):
+    """
+    Return the recognition model, building it on first use.
+
+    Args:
+        model_name (str): DeepFace model name
+
+    Returns:
+        The built DeepFace model
+    """
+    model = _models.get(model_name)
+    if model is None:
+        with _build_lock:
+            model = _models.get(model_name)
+            if model is None:
+                from deepface import DeepFace
+                model = DeepFace.build_model(model_name)
+                _models[model_name] = model
+    return model
+
+
+def get_detector(detector_backend: str = DEFAULT_DETECTOR_BACKEND):
+    """
+    Return the face detector for a DeepFace backend, building it on first use.
+
+    The detector is shared with DeepFace.extract_faces, which looks it up in the
+    same cache.
+
+    Args:
+        detector_backend (str): DeepFace detector backend name
+
+    Returns:
+        The built detector object
+    """
+    detector = _detectors.get(detector_backend)
+    if detector is None:
+        with _build_lock:
+            detector = _detectors.get(detector_backend)
+            if detector is None:
+                from deepface.detectors import FaceDetector
+                detector = FaceDetector.build_model(detector_backend)
+                _detectors[detector_backend] = detector
+    return detector
+
+
+def get_face_cascade():
+    """
+    Return the frontal-face Haar cascade, loaded from disk only once.
+
+    This is the same cascade instance used by DeepFace's "opencv" backend.
+    """
+    return get_detector("opencv")["face_detector"]
+
+
+def preload(model_name: str = DEFAULT_MODEL_NAME,
+            detector_backend: str = DEFAULT_DETECTOR_BACKEND) -> Dict[str, Any]:
+    """
+    Load the recognition model, the detector backend and the Haar cascade, then
+    run a warm-up inference so the first real request does not pay for graph
+    tracing or lazy initialization.
+
+    Args:
+        model_name (str): DeepFace model name
+        detector_backend (str): DeepFace detector backend name
+
+    Returns:
+        Dict[str, Any]: Readiness status (see get_status)
+    """
+    with _status_lock:
+        _status['loading'] = True
+    try:
+        start_time = time.time()
+        model = get_model(model_name)
+        detector = get_detector(detector_backend)
+        get_face_cascade()
+        load_time = time.time() - start_time
+
+        # Warm-up: one forward pass and one detection on blank inputs
+        from deepface.detectors import FaceDetector
+        start_time = time.time()
+        input_shape = model.input_shape[1:]
+        model.predict(np.zeros((1,) + tuple(input_shape), dtype=np.float32), verbose=0)
+        FaceDetector.detect_faces(detector, detector_backend, np.zeros((160, 160, 3), dtype=np.uint8))
+        warmup_time = time.time() - start_time
+
+        with _status_lock:
+            _status.update({
+                'ready': True,
+                'loading': False,
+                'model_name': model_name,
+                'detector_backend': detector_backend,
+                'load_time': load_time,
+                'warmup_time': warmup_time,
+                'error': None
+            })
+    except Exception as e:
+        with _status_lock:
+            _status.update({'ready': False, 'loading': False, 'error': str(e)})
+        raise e
+
+    return get_status()
+
+
+def is_ready() -> bool:
+    """Return True once preload() has completed successfully."""
+    return _status['ready']
+
+
+def get_status() -> Dict[str, Any]:
+    """
+    Return a snapshot of the registry's readiness state.
+
+    Returns:
+        Dict[str, Any]: 'ready', 'loading' (preload() is running), 'model_name',
+        'detector_backend', 'load_time', 'warmup_time' and 'error'
+    """
+    with _status_lock:
+        return dict(_status)
@@ -0,0 +1,109 @@
+import re
+from typing import Dict, Optional, Union
+
+import cv2
+import numpy as np
+
+
+# zxing-cpp is optional; without it barcode decoding is skipped and every
+# field comes from Gemini
+try:
+    import zxingcpp
+except ImportError:
+    zxingcpp = None
+
+# NID fields the back-side PDF417 barcode can provide
+BARCODE_FIELDS = ('Name', 'Date_of_Birth', 'NID_Number')
+
+# Barcode tags (lower-cased) and the NID field each one fills
+TAG_FIELDS = {
+    'name': 'Name',
+    'dob': 'Date_of_Birth',
+    'pin': 'NID_Number',
+    'nid': 'NID_Number'
+}
+
+_TAG_PATTERN = re.compile(r'<(\w+)>(.*?)</\1>', re.IGNORECASE | re.DOTALL)
+
+# Barcodes are found faster on a moderately sized image; PDF417 modules stay
+# readable well below a phone photo's full resolution
+DECODE_MAX_SIDE = 2000
+
+
+def is_available() -> bool:
+    """Return True if the barcode decoder (zxing-cpp) is installed."""
+    return zxingcpp is not None
+
+
+def decode_pdf417(img: np.ndarray) -> Optional[str]:
+    """
+    Find and decode a PDF417 barcode in an image.
+
+    Args:
+        img (np.ndarray): Decoded BGR or grayscale image
+
+    Returns:
+        Optional[str]: The barcode text, or None if no barcode could be read
+            (or zxing-cpp is not installed)
+    """
+    if zxingcpp is None:
+        return None
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    scale = DECODE_MAX_SIDE / max(gray.shape[:2])
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    for result in zxingcpp.read_barcodes(gray, formats=zxingcpp.BarcodeFormat.PDF417):
+        if result.valid and result.text:
+            return result.text
+    return None
+
+
+def parse_barcode_text(text: str) -> Dict[str, str]:
+    """
+    Map the tagged fields of a smart NID barcode to NID fields.
+
+    The barcode holds tags such as '<pin>...</pin><name>...</name><DOB>...</DOB>'
+    followed by fingerprint and signature data. Unknown tags and empty values
+    are ignored.
+
+    Args:
+        text (str): Decoded barcode text
+
+    Returns:
+        Dict[str, str]: The NID fields found, e.g. {'Name': ..., 'NID_Number': ...}
+    """
+    fields = {}
+    for tag, value in _TAG_PATTERN.findall(text):
+        field = TAG_FIELDS.get(tag.lower())
+        value = ' '.join(value.split())
+        if field and value and field not in fields:
+            fields[field] = value
+    return fields
+
+
+def read_nid_barcode(image: Union[bytes, memoryview, np.ndarray]) -> Dict[str, str]:
+    """
+    Read the NID fields encoded in a card's PDF417 barcode.
+
+    Args:
+        image (Union[bytes, memoryview, np.ndarray]): Encoded image bytes or a
+            decoded BGR array
+
+    Returns:
+        Dict[str, str]: The fields found; empty if there is no readable barcode,
+            the image cannot be decoded or zxing-cpp is not installed
+    """
+    if zxingcpp is None:
+        return {}
+
+    if isinstance(image, np.ndarray):
+        img = image
+    else:
+        img = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            return {}
+
+    text = decode_pdf417(img)
+    return parse_barcode_text(text) if text else {}
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+DEFAULT_DB_PATH = os.getenv("NID_CACHE_PATH", "nid_cache.sqlite3")
+DEFAULT_TTL_SECONDS = float(os.getenv("NID_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("NID_CACHE_MAX_ENTRIES", "10000"))
+# How long a connection waits for another process's write lock, in seconds
+DEFAULT_BUSY_TIMEOUT = float(os.getenv("NID_CACHE_BUSY_TIMEOUT", "5"))
+
+
+def make_key(image_bytes: Union[bytes, memoryview], model_name: str, prompt_version: str) -> str:
+    """
+    Build the cache key for an NID extraction.
+
+    Args:
+        image_bytes (Union[bytes, memoryview]): Encoded image bytes sent to the model
+        model_name (str): Gemini model name
+        prompt_version (str): Version of the extraction prompt
+
+    Returns:
+        str: Hex digest identifying the image/model/prompt combination
+    """
+    digest = hashlib.sha256(image_bytes)
+    digest.update(f"|{model_name}|{prompt_version}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class NIDResultCache:
+    """
+    SQLite-backed cache of parsed NID extraction results.
+
+    Entries expire after a TTL, and once the table grows past max_entries the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            db_path (str): SQLite database file
+            ttl_seconds (float): Age after which an entry is no longer served
+            max_entries (int): Maximum number of stored entries
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+        # The API server's worker processes share the file: WAL lets them read
+        # while one writes, and the busy timeout makes writers wait their turn
+        # instead of failing with 'database is locked'
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=DEFAULT_BUSY_TIMEOUT)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(DEFAULT_BUSY_TIMEOUT * 1000)}")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS nid_results (
+                    key TEXT PRIMARY KEY,
+                    model_name TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    result_json TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_nid_results_last_access ON nid_results (last_access)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            Optional[Dict[str, Any]]: The parsed result, or None on a miss or expiry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result_json, created_at FROM nid_results WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+
+            result_json, created_at = row
+            if now - created_at > self.ttl_seconds:
+                with self._conn:
+                    self._conn.execute("DELETE FROM nid_results WHERE key = ?", (key,))
+                self._stats['misses'] += 1
+                self._stats['evictions'] += 1
+                return None
+
+            with self._conn:
+                self._conn.execute("UPDATE nid_results SET last_access = ? WHERE key = ?", (now, key))
+            self._stats['hits'] += 1
+
+        return json.loads(result_json)
+
+    def put(self, key: str, result: Any, model_name: str, prompt_version: str) -> None:
+        """
+        Store a successfully parsed result, evicting old entries if needed.
+
+        Args:
+            key (str): Key from make_key
+            result (Any): Parsed JSON result
+            model_name (str): Gemini model name
+            prompt_version (str): Version of the extraction prompt
+        """
+        now = time.time()
+        result_json = json.dumps(result, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nid_results "
+                "(key, model_name, prompt_version, result_json, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, prompt_version, result_json, now, now)
+            )
+
+            # Expired entries go first, then the least recently used overflow
+            expired = self._conn.execute(
+                "DELETE FROM nid_results WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM nid_results WHERE key IN ("
+                "SELECT key FROM nid_results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._stats['evictions'] += expired + overflow
+
+    def clear(self) -> None:
+        """Remove every cached result."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM nid_results")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and the current number of entries.
+
+        Returns:
+            Dict[str, Any]: 'hits', 'misses', 'evictions' and 'entries'
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = self._conn.execute("SELECT COUNT(*) FROM nid_results").fetchone()[0]
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache() -> NIDResultCache:
+    """Return the process-wide NID result cache, creating it on first use."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = NIDResultCache()
+    return _default_cache
@@ -0,0 +1,179 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+import cv2
+import numpy as np
+import image_io
+
+# Defaults for the upload preprocessing stage
+MAX_SIDE = int(os.getenv("NID_MAX_SIDE", "1600"))
+OUTPUT_FORMAT = os.getenv("NID_OUTPUT_FORMAT", "jpeg")  # 'jpeg' or 'webp'
+QUALITY = int(os.getenv("NID_QUALITY", "85"))
+
+# Card detection runs on a copy whose longest side is this many pixels
+DETECTION_SIDE = 800
+
+# A card outline must cover at least this fraction of the photo to be used for
+# cropping, and crops covering more than MAX_CARD_AREA_FRACTION are skipped
+# because the photo is already tight around the card
+MIN_CARD_AREA_FRACTION = 0.2
+MAX_CARD_AREA_FRACTION = 0.95
+
+_OUTPUT_FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg', cv2.IMWRITE_JPEG_QUALITY),
+    'webp': ('.webp', 'image/webp', cv2.IMWRITE_WEBP_QUALITY)
+}
+
+_stats_lock = threading.Lock()
+_stats = {'images': 0, 'cropped': 0, 'original_bytes': 0, 'processed_bytes': 0}
+
+
+def _order_corners(corners: np.ndarray) -> np.ndarray:
+    # Top-left, top-right, bottom-right, bottom-left
+    corners = corners.astype(np.float32)
+    sums = corners.sum(axis=1)
+    diffs = np.diff(corners, axis=1).ravel()
+    return np.array([
+        corners[np.argmin(sums)],
+        corners[np.argmin(diffs)],
+        corners[np.argmax(sums)],
+        corners[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+
+def find_card(img: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Locate the outline of an ID card in a photo.
+
+    Args:
+        img (np.ndarray): BGR image
+
+    Returns:
+        Optional[np.ndarray]: The four card corners (top-left, top-right,
+        bottom-right, bottom-left) in image coordinates, or None if no card
+        outline was found
+    """
+    height, width = img.shape[:2]
+    scale = min(1.0, DETECTION_SIDE / max(height, width))
+    small = cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(gray, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    image_area = small.shape[0] * small.shape[1]
+
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        area_fraction = cv2.contourArea(approx) / image_area
+        if len(approx) == 4 and MIN_CARD_AREA_FRACTION <= area_fraction <= MAX_CARD_AREA_FRACTION:
+            return _order_corners(approx.reshape(4, 2) / scale)
+    return None
+
+
+def _warp_card(img: np.ndarray, corners: np.ndarray, max_side: int) -> np.ndarray:
+    # Straighten the card and scale it straight to the output size
+    tl, tr, br, bl = corners
+    card_width = max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))
+    card_height = max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))
+    scale = min(1.0, max_side / max(card_width, card_height))
+    out_width, out_height = max(1, int(card_width * scale)), max(1, int(card_height * scale))
+
+    target = np.array([[0, 0], [out_width - 1, 0], [out_width - 1, out_height - 1], [0, out_height - 1]],
+                      dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(img, matrix, (out_width, out_height), flags=cv2.INTER_AREA)
+
+
+def _limit_size(img: np.ndarray, max_side: int) -> np.ndarray:
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1.0:
+        return img
+    return cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+def preprocess_nid_image(image_data: Union[bytes, memoryview], max_side: int = MAX_SIDE,
+                         output_format: str = OUTPUT_FORMAT, quality: int = QUALITY,
+                         crop: bool = True) -> Tuple[bytes, str, Dict[str, Any]]:
+    """
+    Shrink an NID photo before upload.
+
+    The image is decoded with its EXIF orientation applied (OpenCV does this on
+    decode), cropped and straightened to the card outline when one is found,
+    limited to max_side pixels on its longest side, and re-encoded.
+
+    Args:
+        image_data (Union[bytes, memoryview]): Encoded image bytes
+        max_side (int): Maximum length of the longest side, in pixels
+        output_format (str): 'jpeg' or 'webp'
+        quality (int): Encoder quality, 0-100
+        crop (bool): Set to False to skip card detection and cropping
+
+    Returns:
+        Tuple[bytes, str, Dict[str, Any]]: Encoded bytes, MIME type and a record
+        with 'original_bytes', 'processed_bytes', 'saved_bytes',
+        'original_size', 'processed_size' and 'cropped'
+
+    Raises:
+        ValueError: If the image cannot be decoded or the format is unsupported
+    """
+    if output_format not in _OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}. Supported: {', '.join(_OUTPUT_FORMATS)}")
+    extension, mime_type, quality_flag = _OUTPUT_FORMATS[output_format]
+
+    img = image_io.decode_image(image_data)
+    original_size = (img.shape[1], img.shape[0])
+
+    corners = find_card(img) if crop else None
+    if corners is not None:
+        img = _warp_card(img, corners, max_side)
+    else:
+        img = _limit_size(img, max_side)
+
+    ok, buffer = cv2.imencode(extension, img, [quality_flag, quality])
+    if not ok:
+        raise ValueError(f"Could not encode image as {output_format}")
+    processed = buffer.tobytes()
+    processed_size = (img.shape[1], img.shape[0])
+
+    # Small, already compact uploads can grow when re-encoded; keep them as-is
+    # unless the card was cropped out of a larger photo
+    if corners is None and len(processed) >= len(image_data):
+        original_mime_type = image_io.sniff_mime_type(image_data)
+        if original_mime_type is not None:
+            processed, mime_type, processed_size = bytes(image_data), original_mime_type, original_size
+
+    record = {
+        'original_bytes': len(image_data),
+        'processed_bytes': len(processed),
+        'saved_bytes': len(image_data) - len(processed),
+        'original_size': original_size,
+        'processed_size': processed_size,
+        'cropped': corners is not None
+    }
+
+    with _stats_lock:
+        _stats['images'] += 1
+        _stats['cropped'] += int(record['cropped'])
+        _stats['original_bytes'] += record['original_bytes']
+        _stats['processed_bytes'] += record['processed_bytes']
+
+    return processed, mime_type, record
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Return cumulative byte savings from preprocessing in this process.
+
+    Returns:
+        Dict[str, Any]: 'images', 'cropped', 'original_bytes',
+        'processed_bytes', 'saved_bytes' and 'saved_ratio'
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['saved_bytes'] = stats['original_bytes'] - stats['processed_bytes']
+    stats['saved_ratio'] = stats['saved_bytes'] / stats['original_bytes'] if stats['original_bytes'] else 0.0
+    return stats
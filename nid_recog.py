@@ -1,33 +1,94 @@
-import google.generativeai as genai
 import json
+import logging
 import os
+import sqlite3
 from dotenv import load_dotenv
-import random
+import threading
+import asyncio
+import weakref
+import numpy as np
+import image_io
+import nid_cache
+import nid_preprocess
+import nid_barcode
+import metrics
+from key_pool import KeyPool, KeyPoolTimeout
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Gemini model used for extraction
+MODEL_NAME = 'gemini-2.5-flash-preview-05-20'
+
+# Fields extracted from every NID card, in output order
+NID_FIELDS = ['Name', 'Name_Bangla', 'Date_of_Birth', 'NID_Number', "Father's Name", "Mother's Name"]
+
+# Bump PROMPT_VERSION whenever NID_PROMPT or the result format changes so
+# cached results from the old version are not served
+PROMPT_VERSION = '2'
+NID_PROMPT_TEMPLATE = """
+Extract all possible fields from this Bangladeshi National ID card image and return the result as a JSON.
+
+Required fields:
+{fields}
+
+If any field is missing, return null for that field.
+Output JSON only. No explanation, no markdown.
+"""
+
+def _build_prompt(fields):
+    """
+    Build the extraction prompt for the given fields.
+    """
+    return NID_PROMPT_TEMPLATE.format(fields="\n".join(f"- {field}" for field in fields))
+
+NID_PROMPT = _build_prompt(NID_FIELDS)
+
+# Per-key request budget and cool-down for throttled keys
+REQUESTS_PER_MINUTE_PER_KEY = float(os.getenv("GEMINI_RPM_PER_KEY", "10"))
+KEY_COOLDOWN_SECONDS = float(os.getenv("GEMINI_KEY_COOLDOWN_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "4"))
+KEY_WAIT_TIMEOUT_SECONDS = float(os.getenv("GEMINI_KEY_WAIT_TIMEOUT", "60"))
+
+# Shrink uploads before sending them (see nid_preprocess); off unless enabled
+PREPROCESS_UPLOADS = os.getenv("NID_PREPROCESS", "0") == "1"
+
+# Read fields from the card's PDF417 barcode before asking Gemini (needs zxing-cpp)
+READ_BARCODE = os.getenv("NID_BARCODE", "1") == "1"
+
 def get_api_key():
     """
-    Get a Gemini API key from environment variables.
-    Supports multiple keys for load balancing and fallback.
+    Take a Gemini API key from the process-wide key pool.
+    
+    For callers that make their own Gemini requests: the key comes from the
+    same configuration and rotation as get_nid_info, and uses up one request
+    of its per-minute budget.
     
     Returns:
         str: A valid API key
     
     Raises:
         ValueError: If no valid API key is found
+        KeyPoolTimeout: If no key has budget within KEY_WAIT_TIMEOUT_SECONDS
     """
-    # Try to get the default key first
-    api_key = os.getenv("GEMINI_API_KEY")
-    if api_key and api_key != "your_api_key_here":
-        return api_key
+    return get_key_pool().acquire(timeout=KEY_WAIT_TIMEOUT_SECONDS)
+
+def _load_api_keys():
+    """
+    Get every configured Gemini API key (GEMINI_API_KEY and GEMINI_API_KEY_1..10).
     
-    # Try multiple numbered keys
+    Returns:
+        list: Distinct API keys in configuration order
+    
+    Raises:
+        ValueError: If no valid API key is found
+    """
     api_keys = []
-    for i in range(1, 11):  # Support up to 10 keys
-        key = os.getenv(f"GEMINI_API_KEY_{i}")
-        if key and key != "your_api_key_here":
+    for name in ["GEMINI_API_KEY"] + [f"GEMINI_API_KEY_{i}" for i in range(1, 11)]:
+        key = os.getenv(name)
+        if key and key != "your_api_key_here" and key not in api_keys:
             api_keys.append(key)
     
     if not api_keys:
@@ -35,122 +96,459 @@ def get_api_key():
             "No valid Gemini API key found in environment variables. "
             "Please set GEMINI_API_KEY or GEMINI_API_KEY_1, GEMINI_API_KEY_2, etc. in your .env file"
         )
+    return api_keys
+
+_key_pool = None
+_gemini_client = None  # Optional stand-in for the Gemini API, see set_gemini_client
+_clients = {}
+# Async clients are bound to the event loop they were created on
+_async_clients = weakref.WeakKeyDictionary()
+_pool_lock = threading.Lock()
+
+def get_key_pool():
+    """
+    Get the process-wide Gemini key pool, creating it on first use.
+    
+    Keys are handed out round-robin, each within its requests-per-minute budget;
+    keys that hit a quota error are benched for a cool-down period.
     
-    # Return a random key for load balancing
-    return random.choice(api_keys)
+    Returns:
+        KeyPool: The key pool
+    
+    Raises:
+        ValueError: If no valid API key is found
+    """
+    global _key_pool
+    with _pool_lock:
+        if _key_pool is None:
+            _key_pool = KeyPool(_load_api_keys(), REQUESTS_PER_MINUTE_PER_KEY, KEY_COOLDOWN_SECONDS)
+        return _key_pool
 
-def get_nid_info(image_path):
+def set_key_pool(key_pool):
     """
-    Extracts structured information from a Bangladeshi NID card image using Gemini 2.5 Flash.
+    Replace the process-wide key pool, e.g. with one built from test keys.
+    
+    Args:
+        key_pool (KeyPool): The pool to use, or None to rebuild from the environment
+    
+    Returns:
+        KeyPool: The previously installed pool (or None)
+    """
+    global _key_pool
+    with _pool_lock:
+        previous, _key_pool = _key_pool, key_pool
+    return previous
+
+def set_gemini_client(client):
+    """
+    Route extraction requests to a stand-in instead of the Gemini API.
+    
+    The client must provide generate(api_key, image_data, mime_type, prompt)
+    and an async generate_async with the same arguments, both returning the
+    raw response text. Useful for offline benchmarks and tests.
     
     Args:
-        image_path (str): The file path to the image of the NID card.
+        client: The stand-in client, or None to restore the real API
     
     Returns:
-        dict: A dictionary containing the extracted NID card fields.
+        The previously installed client (None for the real API)
+    """
+    global _gemini_client
+    previous, _gemini_client = _gemini_client, client
+    return previous
+
+def _get_model(api_key):
+    """
+    Get a Gemini model bound to a specific API key.
     
-    Raises:
-        FileNotFoundError: If the image file does not exist.
-        ValueError: If the image cannot be read or if JSON parsing fails.
-        Exception: For any other issues during the Gemini API call.
+    genai.configure() swaps a single process-wide client, which is not safe when
+    requests using different keys run concurrently, so each key gets its own
+    client instead.
     """
-    # Get API key from environment variables
-    api_key = get_api_key()
-    genai.configure(api_key=api_key)
+    # The Gemini SDK takes a second or more to import, so it is loaded by the
+    # first real request rather than by everything that imports this module
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
     
-    # Use the specific preview model
-    model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
+    with _pool_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+            _clients[api_key] = client
+    model = genai.GenerativeModel(MODEL_NAME)
+    model._client = client
+    return model
+
+def _get_async_model(api_key):
+    """
+    Get a Gemini model bound to a specific API key for use with generate_content_async.
+    """
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
     
-    # Ensure the image file exists
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found at: {image_path}")
+    loop = asyncio.get_running_loop()
+    with _pool_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(api_key)
+        if client is None:
+            client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+            loop_clients[api_key] = client
+    model = genai.GenerativeModel(MODEL_NAME)
+    model._async_client = client
+    return model
+
+def _build_request(image_data, mime_type, prompt=NID_PROMPT):
+    """
+    Build the content parts and generation config for an extraction request.
+    """
+    import google.generativeai as genai
     
-    # Determine mime_type dynamically based on file extension
-    _, file_extension = os.path.splitext(image_path)
-    mime_type = None
+    # The image data should be passed directly within the list of content parts.
+    # The SDK automatically handles the conversion to the correct internal type.
+    contents = [
+        prompt,
+        {
+            'mime_type': mime_type,
+            'data': image_data
+        }
+    ]
+    generation_config = genai.GenerationConfig(
+        temperature=0.1,
+        response_mime_type="application/json"
+    )
+    return contents, generation_config
+
+def _generate(api_key, image_data, mime_type, prompt=NID_PROMPT):
+    """
+    Send one extraction request to Gemini and return the raw response text.
+    """
+    if _gemini_client is not None:
+        return _gemini_client.generate(api_key, image_data, mime_type, prompt)
     
-    # Map file extensions to MIME types
-    mime_type_map = {
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.webp': 'image/webp',
-        '.bmp': 'image/bmp',
-        '.tiff': 'image/tiff',
-        '.tif': 'image/tiff',
-        '.gif': 'image/gif'
-    }
+    model = _get_model(api_key)
+    contents, generation_config = _build_request(image_data, mime_type, prompt)
+    response = model.generate_content(contents, generation_config=generation_config)
+    response.resolve()  # Ensure the response is complete
+    return response.text
+
+async def _generate_async(api_key, image_data, mime_type, prompt=NID_PROMPT):
+    """
+    Async version of _generate.
+    """
+    if _gemini_client is not None:
+        return await _gemini_client.generate_async(api_key, image_data, mime_type, prompt)
     
-    mime_type = mime_type_map.get(file_extension.lower())
+    model = _get_async_model(api_key)
+    contents, generation_config = _build_request(image_data, mime_type, prompt)
+    response = await model.generate_content_async(contents, generation_config=generation_config)
+    await response.resolve()  # Ensure the response is complete
+    return response.text
+
+def _parse_response(response_text):
+    """
+    Parse the JSON returned by Gemini.
     
-    if mime_type is None:
-        raise ValueError(f"Unsupported image format: {file_extension}. Supported formats: {', '.join(mime_type_map.keys())}")
+    Raises:
+        ValueError: If JSON parsing fails or the JSON is not an object.
+    """
+    # Attempt JSON parsing
+    response_text = response_text.strip()
+    # Remove potential markdown code block wrappers
+    if response_text.startswith("```json") and response_text.endswith("```"):
+        json_str = response_text[7:-3].strip()
+    else:
+        json_str = response_text
     
-    # Load image data in binary mode
     try:
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
-    except IOError as e:
-        raise ValueError(f"Could not read image file {image_path}: {e}")
+        # Parse the JSON string
+        parsed = json.loads(json_str)
+    except json.JSONDecodeError as e:
+        # Provide more context if JSON parsing fails
+        raise ValueError(f"Failed to parse JSON from Gemini response: {e}\nRaw Output:\n{response_text}")
+    # Fields are looked up by name, so an array or a bare value is as unusable as invalid JSON
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Failed to parse JSON from Gemini response: expected an object, "
+                         f"got {type(parsed).__name__}\nRaw Output:\n{response_text}")
+    return parsed
+
+def _read_barcode(image_data, timings):
+    """
+    Read NID fields from the card's barcode, recording the outcome in the metrics.
+    """
+    with metrics.stage('nid', 'barcode', timings):
+        barcode_fields = nid_barcode.read_nid_barcode(image_data)
+    metrics.inc('nid_barcode_total', result='decoded' if barcode_fields else 'not_found')
+    return barcode_fields
+
+def _cache_get(cache, cache_key):
+    """
+    Look up a cached result, treating a cache failure (e.g. 'database is locked') as a miss.
+    """
+    try:
+        cached_result = cache.get(cache_key)
+    except sqlite3.Error as e:
+        logger.warning("NID cache lookup failed: %s", e)
+        metrics.inc('nid_cache_total', result='error')
+        return None
+    metrics.inc('nid_cache_total', result='miss' if cached_result is None else 'hit')
+    return cached_result
+
+def _cache_put(cache, cache_key, nid_info):
+    """
+    Store a result in the cache; a cache failure is logged and otherwise ignored.
+    """
+    try:
+        cache.put(cache_key, nid_info, MODEL_NAME, PROMPT_VERSION)
+    except sqlite3.Error as e:
+        logger.warning("NID cache store failed: %s", e)
+        metrics.inc('nid_cache_total', result='error')
+
+def _merge_fields(barcode_fields, gemini_fields):
+    """
+    Combine barcode and Gemini fields into one NID result.
     
-    prompt = """
-Extract all possible fields from this Bangladeshi National ID card image and return the result as a JSON.
+    Barcode values take precedence. Every field in NID_FIELDS is present (None
+    if no source had it) and '_sources' maps each field to 'barcode', 'gemini'
+    or None.
+    """
+    if not isinstance(gemini_fields, dict):
+        raise ValueError(f"Expected the Gemini fields as a JSON object, got {type(gemini_fields).__name__}")
+    nid_info = {}
+    sources = {}
+    for field in NID_FIELDS:
+        if barcode_fields.get(field):
+            nid_info[field], sources[field] = barcode_fields[field], 'barcode'
+        elif gemini_fields.get(field) is not None:
+            nid_info[field], sources[field] = gemini_fields[field], 'gemini'
+        else:
+            nid_info[field], sources[field] = None, None
+    nid_info['_sources'] = sources
+    return nid_info
 
-Required fields:
-- Name
-- Name_Bangla
-- Date_of_Birth
-- NID_Number
-- Father's Name
-- Mother's Name
+def _load_image_data(image):
+    """
+    Get the encoded bytes and MIME type of an NID image.
 
-If any field is missing, return null for that field.
-Output JSON only. No explanation, no markdown.
-"""
+    Args:
+        image: File path, encoded image bytes (bytes, bytearray or memoryview),
+            binary file-like object or decoded BGR array.
+
+    Returns:
+        tuple: (image bytes, MIME type)
+
+    Raises:
+        FileNotFoundError: If an image path does not exist.
+        ValueError: If the image cannot be read or its format is unsupported.
+    """
+    # Decoded arrays are re-encoded as JPEG for upload
+    if isinstance(image, np.ndarray):
+        return image_io.encode_image(image, '.jpg'), 'image/jpeg'
+
+    if image_io.is_path(image):
+        # Ensure the image file exists
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"Image file not found at: {image}")
+
+        # Determine mime_type dynamically based on file extension
+        _, file_extension = os.path.splitext(image)
+        mime_type = image_io.MIME_TYPE_MAP.get(file_extension.lower())
+        if mime_type is None:
+            raise ValueError(f"Unsupported image format: {file_extension}. Supported formats: {', '.join(image_io.MIME_TYPE_MAP.keys())}")
+
+        # Load image data in binary mode
+        return image_io.read_image_bytes(image), mime_type
+
+    # In-memory data: determine mime_type from the image header
+    image_data = image_io.read_image_bytes(image)
+    mime_type = image_io.sniff_mime_type(image_data)
+    if mime_type is None:
+        raise ValueError(f"Unsupported image format for {image_io.describe_source(image)}. Supported formats: {', '.join(image_io.MIME_TYPE_MAP.keys())}")
+
+    # The Gemini SDK needs an immutable bytes object; this is the only copy
+    if not isinstance(image_data, bytes):
+        image_data = bytes(image_data)
+    return image_data, mime_type
+
+def get_nid_info(image_path, use_cache=True, preprocess=None, timings=None, fields=None, read_barcode=None):
+    """
+    Extracts structured information from a Bangladeshi NID card image using Gemini 2.5 Flash.
     
-    try:
-        # The image data should be passed directly within the list of content parts.
-        # The SDK automatically handles the conversion to the correct internal type.
-        response = model.generate_content(
-            [
-                prompt,
-                {
-                    'mime_type': mime_type,
-                    'data': image_data
-                }
-            ],
-            generation_config=genai.GenerationConfig(
-                temperature=0.1,
-                response_mime_type="application/json"
-            )
-        )
-        response.resolve()  # Ensure the response is complete
+    The card's PDF417 barcode (on the back of smart cards) is read locally first.
+    Gemini is only asked for the fields the barcode does not provide, and is not
+    called at all when the barcode covers every requested field.
+    
+    Results that include every field are cached locally by image content, model
+    name and prompt version, so resubmitting the same image does not call Gemini again.
+    
+    Args:
+        image_path: The NID card image: a file path, encoded image bytes (bytes,
+            bytearray or memoryview such as an upload's getbuffer()), a binary
+            file-like object, or a decoded BGR NumPy array.
+        use_cache (bool): Set to False to bypass the result cache and always
+            call Gemini (the fresh result is still stored).
+        preprocess (bool): Apply EXIF orientation, crop to the card, downscale
+            and re-encode the image before upload. Defaults to the NID_PREPROCESS
+            environment setting.
+        timings (dict): Optional dict filled with the seconds spent in each
+            stage ('load', 'cache_lookup', 'barcode', 'preprocess', 'gemini',
+            'parse', 'cache_store') and in 'total'. Stages that did not run are absent.
+        fields (list): The fields the caller needs (default: all of NID_FIELDS).
+            Fields not requested and not in the barcode are returned as None.
+        read_barcode (bool): Try the barcode before Gemini. Defaults to the
+            NID_BARCODE environment setting (on); needs zxing-cpp.
+    
+    Returns:
+        dict: A dictionary containing the extracted NID card fields, plus
+            '_sources' mapping each field to 'barcode', 'gemini' or None.
+    
+    Raises:
+        FileNotFoundError: If the image file does not exist.
+        ValueError: If the image cannot be read or if JSON parsing fails.
+        KeyPoolTimeout: If no API key has budget within KEY_WAIT_TIMEOUT_SECONDS.
+        Exception: For any other issues during the Gemini API call.
+    """
+    with metrics.track('nid', timings):
+        # Load the image bytes and determine the MIME type
+        with metrics.stage('nid', 'load', timings):
+            image_data, mime_type = _load_image_data(image_path)
         
-        # Attempt JSON parsing
-        response_text = response.text.strip()
-        # Remove potential markdown code block wrappers
-        if response_text.startswith("```json") and response_text.endswith("```"):
-            json_str = response_text[7:-3].strip()
-        else:
-            json_str = response_text
+        # Serve repeated images from the local result cache
+        cache = nid_cache.get_cache()
+        cache_key = nid_cache.make_key(image_data, MODEL_NAME, PROMPT_VERSION)
+        if use_cache:
+            with metrics.stage('nid', 'cache_lookup', timings):
+                cached_result = _cache_get(cache, cache_key)
+            if cached_result is not None:
+                return cached_result
         
-        # Parse the JSON string
-        return json.loads(json_str)
+        # Read what we can locally from the barcode, at full resolution
+        barcode_fields = {}
+        if READ_BARCODE if read_barcode is None else read_barcode:
+            barcode_fields = _read_barcode(image_data, timings)
+        requested = NID_FIELDS if fields is None else fields
+        missing = [field for field in requested if field not in barcode_fields]
+        if not missing:
+            return _merge_fields(barcode_fields, {})
         
-    except json.JSONDecodeError as e:
-        # Provide more context if JSON parsing fails
-        raise ValueError(f"Failed to parse JSON from Gemini response: {e}\nRaw Output:\n{response.text}")
-    except Exception as e:
-        # Catch other potential API or network errors
-        raise Exception(f"An error occurred during Gemini API call: {e}")
+        # Optionally shrink the upload; the cache key above uses the original bytes
+        if PREPROCESS_UPLOADS if preprocess is None else preprocess:
+            with metrics.stage('nid', 'preprocess', timings):
+                image_data, mime_type, _ = nid_preprocess.preprocess_nid_image(image_data)
+        
+        # Get the API key pool (raises ValueError if no key is configured)
+        key_pool = get_key_pool()
+        prompt = NID_PROMPT if missing == NID_FIELDS else _build_prompt(missing)
+        
+        try:
+            # Call Gemini with a pooled key; quota and transient errors are retried
+            # on another key with exponential backoff
+            with metrics.stage('nid', 'gemini', timings):
+                response_text = key_pool.call(
+                    lambda api_key: _generate(api_key, image_data, mime_type, prompt),
+                    max_attempts=MAX_ATTEMPTS,
+                    timeout=KEY_WAIT_TIMEOUT_SECONDS
+                )
+        except KeyPoolTimeout:
+            raise
+        except Exception as e:
+            # Catch other potential API or network errors
+            raise Exception(f"An error occurred during Gemini API call: {e}") from e
+        
+        with metrics.stage('nid', 'parse', timings):
+            gemini_fields = _parse_response(response_text)
+            nid_info = _merge_fields(barcode_fields, {field: gemini_fields.get(field) for field in missing})
+        
+        # Only successfully parsed, complete results are cached
+        if fields is None:
+            with metrics.stage('nid', 'cache_store', timings):
+                _cache_put(cache, cache_key, nid_info)
+        return nid_info
 
+async def get_nid_info_async(image_path, use_cache=True, preprocess=None, timings=None, fields=None,
+                             read_barcode=None):
+    """
+    Async version of get_nid_info for running many extractions concurrently.
+    
+    File reads, barcode decoding and cache lookups run in a worker thread and
+    the Gemini call uses the SDK's async client, so the event loop is never blocked.
+    
+    Args:
+        image_path: The NID card image (same inputs as get_nid_info).
+        use_cache (bool): Set to False to bypass the result cache.
+        preprocess (bool): Shrink the image before upload (see get_nid_info).
+        timings (dict): Optional dict filled with per-stage seconds (see get_nid_info).
+        fields (list): The fields the caller needs (see get_nid_info).
+        read_barcode (bool): Try the barcode before Gemini (see get_nid_info).
+    
+    Returns:
+        dict: A dictionary containing the extracted NID card fields and '_sources'.
+    
+    Raises:
+        FileNotFoundError: If the image file does not exist.
+        ValueError: If the image cannot be read or if JSON parsing fails.
+        KeyPoolTimeout: If no API key has budget within KEY_WAIT_TIMEOUT_SECONDS.
+        Exception: For any other issues during the Gemini API call.
+    """
+    with metrics.track('nid', timings):
+        # Load the image bytes and determine the MIME type
+        with metrics.stage('nid', 'load', timings):
+            image_data, mime_type = await asyncio.to_thread(_load_image_data, image_path)
+        
+        # Serve repeated images from the local result cache
+        cache = nid_cache.get_cache()
+        cache_key = nid_cache.make_key(image_data, MODEL_NAME, PROMPT_VERSION)
+        if use_cache:
+            with metrics.stage('nid', 'cache_lookup', timings):
+                cached_result = await asyncio.to_thread(_cache_get, cache, cache_key)
+            if cached_result is not None:
+                return cached_result
+        
+        # Read what we can locally from the barcode, at full resolution
+        barcode_fields = {}
+        if READ_BARCODE if read_barcode is None else read_barcode:
+            barcode_fields = await asyncio.to_thread(_read_barcode, image_data, timings)
+        requested = NID_FIELDS if fields is None else fields
+        missing = [field for field in requested if field not in barcode_fields]
+        if not missing:
+            return _merge_fields(barcode_fields, {})
+        
+        # Optionally shrink the upload; the cache key above uses the original bytes
+        if PREPROCESS_UPLOADS if preprocess is None else preprocess:
+            with metrics.stage('nid', 'preprocess', timings):
+                image_data, mime_type, _ = await asyncio.to_thread(nid_preprocess.preprocess_nid_image, image_data)
+        
+        # Get the API key pool (raises ValueError if no key is configured)
+        key_pool = get_key_pool()
+        prompt = NID_PROMPT if missing == NID_FIELDS else _build_prompt(missing)
+        
+        try:
+            with metrics.stage('nid', 'gemini', timings):
+                response_text = await key_pool.call_async(
+                    lambda api_key: _generate_async(api_key, image_data, mime_type, prompt),
+                    max_attempts=MAX_ATTEMPTS,
+                    timeout=KEY_WAIT_TIMEOUT_SECONDS
+                )
+        except KeyPoolTimeout:
+            raise
+        except Exception as e:
+            # Catch other potential API or network errors
+            raise Exception(f"An error occurred during Gemini API call: {e}") from e
+        
+        with metrics.stage('nid', 'parse', timings):
+            gemini_fields = _parse_response(response_text)
+            nid_info = _merge_fields(barcode_fields, {field: gemini_fields.get(field) for field in missing})
+        
+        # Only successfully parsed, complete results are cached
+        if fields is None:
+            with metrics.stage('nid', 'cache_store', timings):
+                await asyncio.to_thread(_cache_put, cache, cache_key, nid_info)
+        return nid_info
 
 if __name__ == "__main__":
     try:
         # Test API key availability
-        api_key = get_api_key()
-        print("API key loaded successfully")
-        print(f"Using key: {api_key[:10]}...{api_key[-4:]}")
+        key_stats = get_key_pool().get_stats()
+        print(f"{len(key_stats)} API key(s) loaded: {', '.join(key_stats)}")
         
         # Example usage
         nid_info = get_nid_info("images/NID6.jpeg")
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Durable audit store for face verification, NID extraction and onboarding results.
+
+Usage (compliance queries):
+    python result_store.py --nid 1234567890
+    python result_store.py --since 2025-01-01 --until 2025-02-01 --kind kyc
+
+Callers hand results to record(), which only puts them on an in-process
+queue. A background writer drains the queue and commits them in batched
+transactions to a SQLite database in WAL mode, so the request path never
+waits for the disk. Face crops are written once each as PNG files named by
+their content hash, and records refer to them by that hash. Records are
+indexed by NID number and time for lookups.
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# The store is on unless RESULT_STORE=0
+RESULT_STORE_ENABLED = os.getenv("RESULT_STORE", "1") == "1"
+DEFAULT_DB_PATH = os.getenv("RESULT_STORE_PATH", "results.sqlite3")
+DEFAULT_CROPS_DIR = os.getenv("RESULT_STORE_CROPS_DIR", "result_crops")
+# Records per transaction, and the longest a record waits for its batch
+DEFAULT_BATCH_SIZE = int(os.getenv("RESULT_STORE_BATCH_SIZE", "100"))
+DEFAULT_FLUSH_SECONDS = float(os.getenv("RESULT_STORE_FLUSH_SECONDS", "0.5"))
+# Records waiting to be written; beyond this new records are dropped (and
+# counted) rather than slowing down requests
+DEFAULT_MAX_QUEUE = int(os.getenv("RESULT_STORE_MAX_QUEUE", "10000"))
+
+metrics.REGISTRY.describe("result_store_total", "Result store records by outcome (queued, dropped, written, failed).")
+metrics.REGISTRY.describe("result_store_batch_seconds", "Time to write one batch of records, crops included.")
+
+_STOP = object()
+
+
+def normalize_nid_number(value: Any) -> Optional[str]:
+    """Reduce an NID number to its digits (Bangla digits become ASCII), or None."""
+    if value is None:
+        return None
+    digits = ''.join(str(unicodedata.digit(char)) for char in str(value) if char.isdigit())
+    return digits or None
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars and small arrays (e.g. np.bool_ verdicts) in results
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _is_crop(value: Any) -> bool:
+    return isinstance(value, np.ndarray) and value.ndim == 3 and value.dtype == np.uint8
+
+
+class ResultStore:
+    """
+    SQLite-backed result log with a queue and a background batch writer.
+
+    submit() never blocks; flush() waits until everything submitted so far is
+    committed.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, crops_dir: str = DEFAULT_CROPS_DIR,
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Args:
+            db_path (str): SQLite database file
+            crops_dir (str): Directory for the face crop PNGs
+            batch_size (int): Most records per transaction
+            flush_seconds (float): Longest a record waits for more records to
+                join its batch
+            max_queue (int): Records that may wait to be written
+        """
+        self.db_path = db_path
+        self.crops_dir = crops_dir
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = max(0.0, flush_seconds)
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Counters and the connection have separate locks, so submit() never
+        # waits for a batch being committed
+        self._stats_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._stats = {'queued': 0, 'dropped': 0, 'written': 0, 'failed': 0, 'batches': 0}
+
+        self._conn = self._connect()
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    nid_number TEXT,
+                    verified INTEGER,
+                    payload_json TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_nid_number ON results (nid_number, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_kind ON results (kind, created_at)")
+
+        self._thread = threading.Thread(target=self._run, name="result-store-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        # WAL lets queries (and other processes) read while the writer commits;
+        # synchronous=NORMAL keeps commits durable across application crashes
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def submit(self, kind: str, result: Dict[str, Any], channel: str = 'library') -> bool:
+        """
+        Queue a result for writing.
+
+        Args:
+            kind (str): 'face', 'nid' or 'kyc'
+            result (Dict[str, Any]): The detect_face, get_nid_info or
+                verify_customer result; cropped face arrays in it are stored as
+                crops
+            channel (str): Where the request came from, e.g. 'ui' or 'api'
+
+        Returns:
+            bool: False if the queue was full and the record was dropped
+        """
+        # A shallow copy, so callers can replace keys after submitting
+        item = (kind, channel, time.time(), dict(result))
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('queued')
+        return True
+
+    def _count(self, outcome: str, records: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[outcome] += records
+            if outcome == 'written':
+                self._stats['batches'] += 1
+        metrics.inc('result_store_total', records, result=outcome)
+
+    def flush(self) -> None:
+        """Wait until every record submitted so far has been written (or has failed)."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write the remaining records and stop the writer."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        with self._db_lock:
+            self._conn.close()
+
+    def _collect(self) -> list:
+        # Block for the first record, then take more until the batch is full
+        # or the first record has waited flush_seconds
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            records = [item for item in batch if item is not _STOP]
+            if records:
+                self._write(records)
+            for _ in batch:
+                self._queue.task_done()
+            if len(records) < len(batch):
+                return
+
+    def _store_crop(self, crop: np.ndarray) -> str:
+        """Write an RGB crop as a PNG named by its content hash, once; return the hash."""
+        digest = hashlib.sha256(f"{crop.shape}|".encode("utf-8"))
+        digest.update(np.ascontiguousarray(crop).data)
+        crop_hash = digest.hexdigest()
+        path = self.crop_path(crop_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ok, buffer = cv2.imencode('.png', crop[:, :, ::-1])
+            if not ok:
+                raise ValueError("Could not encode face crop")
+            # Write to a temporary name first so a crash never leaves a partial file
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(buffer.tobytes())
+            os.replace(temp_path, path)
+        return crop_hash
+
+    def _to_payload(self, value: Any) -> Any:
+        # Replace crops with their hashes, recursing into nested results
+        if _is_crop(value):
+            return {'crop': self._store_crop(value)}
+        if isinstance(value, dict):
+            return {key: self._to_payload(item) for key, item in value.items()}
+        return value
+
+    def _write(self, records: list) -> None:
+        start_time = time.perf_counter()
+        try:
+            # Crops are written before the records that refer to them
+            rows = []
+            for kind, channel, created_at, result in records:
+                payload = self._to_payload(result)
+                nid_info = result.get('nid_info') if kind == 'kyc' else result
+                verified = result.get('verified')
+                rows.append((
+                    kind, channel, created_at,
+                    normalize_nid_number((nid_info or {}).get('NID_Number')),
+                    None if verified is None else int(bool(verified)),
+                    json.dumps(payload, ensure_ascii=False, default=_json_default)
+                ))
+            with self._db_lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO results (kind, channel, created_at, nid_number, verified, payload_json) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        except Exception as e:
+            # Any failure drops this batch only; the writer keeps running
+            logger.warning("Result store: %d records not written: %s: %s", len(records), type(e).__name__, e)
+            self._count('failed', len(records))
+            return
+
+        self._count('written', len(records))
+        metrics.observe('result_store_batch_seconds', time.perf_counter() - start_time)
+
+    def query(self, nid_number: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, kind: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Look up stored records, newest first.
+
+        Args:
+            nid_number (str): Only records for this NID number (any formatting)
+            start (float): Only records created at or after this Unix time
+            end (float): Only records created before this Unix time
+            kind (str): Only 'face', 'nid' or 'kyc' records
+            limit (int): Most records to return
+
+        Returns:
+            List[Dict[str, Any]]: 'id', 'kind', 'channel', 'created_at',
+                'nid_number', 'verified' and the stored 'result' of each record;
+                crops appear as {'crop': <hash>} (see load_crop)
+        """
+        clauses, params = [], []
+        if nid_number is not None:
+            clauses.append("nid_number = ?")
+            params.append(normalize_nid_number(nid_number))
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(end)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, channel, created_at, nid_number, verified, payload_json FROM results "
+                f"{where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [
+            {'id': row[0], 'kind': row[1], 'channel': row[2], 'created_at': row[3], 'nid_number': row[4],
+             'verified': None if row[5] is None else bool(row[5]), 'result': json.loads(row[6])}
+            for row in rows
+        ]
+
+    def crop_path(self, crop_hash: str) -> str:
+        """Path of the PNG for a crop hash."""
+        return os.path.join(self.crops_dir, crop_hash[:2], f"{crop_hash}.png")
+
+    def load_crop(self, crop_hash: str) -> Optional[np.ndarray]:
+        """Load a stored crop as an RGB array, or None if it is missing."""
+        img = cv2.imread(self.crop_path(crop_hash))
+        return None if img is None else cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return writer counters and the current backlog.
+
+        Returns:
+            Dict[str, Any]: 'queued', 'dropped', 'written', 'failed', 'batches'
+                and 'pending' (records waiting to be written)
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        return stats
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store() -> ResultStore:
+    """Return the process-wide result store, creating it on first use."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ResultStore()
+                # Write what is still queued when the interpreter exits
+                atexit.register(_default_store.close)
+    return _default_store
+
+
+def set_store(store: Optional[ResultStore]) -> Optional[ResultStore]:
+    """
+    Replace the process-wide result store.
+
+    Args:
+        store (Optional[ResultStore]): The new store, or None to create the
+            default one again on next use
+
+    Returns:
+        Optional[ResultStore]: The previous store
+    """
+    global _default_store
+    with _default_store_lock:
+        previous, _default_store = _default_store, store
+    return previous
+
+
+def close_store() -> None:
+    """Write what the process-wide store still has queued and stop it, if it was started."""
+    store = set_store(None)
+    if store is not None:
+        store.close()
+
+
+def record(kind: str, result: Dict[str, Any], channel: str = 'library') -> bool:
+    """
+    Queue a result in the process-wide store; a no-op when RESULT_STORE=0.
+
+    Returns:
+        bool: True if the record was queued
+    """
+    if not RESULT_STORE_ENABLED:
+        return False
+    return get_store().submit(kind, result, channel)
+
+
+def _parse_time(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    """Print the stored records matching the command line filters as JSON lines."""
+    parser = argparse.ArgumentParser(description="Query stored verification and extraction results.")
+    parser.add_argument("--nid", help="NID number")
+    parser.add_argument("--since", type=_parse_time, help="Start time (ISO 8601, e.g. 2025-01-31 or 2025-01-31T09:00)")
+    parser.add_argument("--until", type=_parse_time, help="End time, exclusive (ISO 8601)")
+    parser.add_argument("--kind", choices=['face', 'nid', 'kyc'], help="Only this kind of record")
+    parser.add_argument("--limit", type=int, default=100, help="Most records to print")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Database file (default: RESULT_STORE_PATH)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"No result store at {args.db}")
+    store = ResultStore(db_path=args.db)
+    try:
+        for row in store.query(args.nid, args.since, args.until, args.kind, args.limit):
+            row['created_at'] = datetime.fromtimestamp(row['created_at']).isoformat(timespec='seconds')
+            print(json.dumps(row, ensure_ascii=False))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
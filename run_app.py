@@ -1,27 +1,45 @@
 #!/usr/bin/env python3
 """
 Script to run the EXIM Bank Project Streamlit application.
+
+Usage:
+    python run_app.py
+    python run_app.py --preload eager
+    python run_app.py --import-report
 """
 
+import argparse
 import subprocess
 import sys
 import os
 
 def main():
     """Run the Streamlit application."""
+    parser = argparse.ArgumentParser(description="Run the EXIM Bank Streamlit application.")
+    parser.add_argument("--preload", choices=["background", "eager", "lazy"],
+                        default=os.getenv("APP_FACE_PRELOAD", "background"),
+                        help="When to load the face models: after the first render (background), "
+                             "before it (eager) or on the first face comparison (lazy)")
+    parser.add_argument("--import-report", action="store_true",
+                        help="Print the startup and per-tab import times instead of starting the app")
+    args = parser.parse_args()
+
+    if args.import_report:
+        sys.exit(subprocess.run([sys.executable, "-m", "benchmarks.bench_imports"]).returncode)
+
     print("Local URL: http://localhost:8501")
-    
+
     try:
         # Run streamlit app
         subprocess.run([
             sys.executable, "-m", "streamlit", "run", "interface.py",
             "--server.port", "8501",
             "--server.address", "localhost"
-        ])
+        ], env=dict(os.environ, APP_FACE_PRELOAD=args.preload))
     except KeyboardInterrupt:
         print("\nStopped by user.")
     except Exception as e:
         print(f"Error running app: {e}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()